@@ -2,6 +2,7 @@
 
 from typing import Optional
 import json
+from backend.services.agent_cache import LOAD_ZONE_TABLE, MODEL_REGISTRY_TABLE, get_agent_cache
 
 class LoadForecastAgent:
     """Agent specialized in load forecasting and demand analysis."""
@@ -9,14 +10,9 @@ class LoadForecastAgent:
     name = "Load Forecast Agent"
     description = "Analyzes electricity demand patterns, forecasting accuracy, and load trends"
     
-    def __init__(self, snow_conn):
-        self.snow_conn = snow_conn
-    
-    async def process(self, query: str, context: Optional[str] = None) -> dict:
-        """Process a load-related query."""
-        cursor = self.snow_conn.cursor()
-        
-        cursor.execute("""
+    datasets = {
+        'zones': (
+            """
             SELECT 
                 z.ZONE_CODE,
                 z.ZONE_NAME,
@@ -25,9 +21,18 @@ class LoadForecastAgent:
             FROM POWER_UTILITIES_DB.ATOMIC.LOAD_ZONE z
             CROSS JOIN POWER_UTILITIES_DB.ML.MODEL_REGISTRY m
             WHERE m.MODEL_NAME = 'LOAD_FORECASTER' AND m.IS_ACTIVE = TRUE
-        """)
-        
-        zones = cursor.fetchall()
+            """,
+            list,
+            [LOAD_ZONE_TABLE, MODEL_REGISTRY_TABLE]
+        ),
+    }
+    
+    def __init__(self, snow_conn):
+        self.snow_conn = snow_conn
+    
+    async def process(self, query: str, context: Optional[str] = None) -> dict:
+        """Process a load-related query."""
+        zones = get_agent_cache().get_many(self.snow_conn, 'load', self.datasets)['zones']
         
         zone_summary = []
         for zone in zones:
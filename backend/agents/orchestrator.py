@@ -3,12 +3,73 @@ Multi-Agent Orchestrator for Power & Utilities Platform
 Routes queries to specialized agents based on intent
 """
 
-from typing import Optional
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from backend.agents.load_agent import LoadForecastAgent
 from backend.agents.price_agent import PriceAnalystAgent
 from backend.agents.weather_agent import WeatherRiskAgent
 from backend.agents.search_agent import KnowledgeSearchAgent
 
+# Keywords per intent, matched as substrings of the lower-cased query exactly
+# as the original per-keyword scan did, so routing is unchanged.
+INTENT_TERMS = {
+    'load': ['load', 'demand', 'forecast', 'mw', 'consumption', 'usage'],
+    'price': ['price', 'lmp', 'cost', 'spike', 'congestion', 'spread'],
+    'weather': ['weather', 'temperature', 'wind', 'heat', 'cold', 'storm'],
+    'search': ['news', 'article', 'ferc', 'regulation', 'policy', 'rto'],
+}
+DEFAULT_INTENT = 'load'
+AGENT_TIMEOUT_SECONDS = 10.0
+MAX_AGENT_TIMEOUT_SECONDS = 60.0
+# Agents that time out keep running until their warehouse call returns, so
+# they get their own small pool instead of the loop's default executor.
+AGENT_WORKERS = 8
+
+
+class IntentClassifier:
+    """
+    Keyword-to-intent table and one compiled pattern built once. The pattern
+    is a zero-width lookahead over all keywords, so a single findall visits
+    every position and reports overlapping substring hits just like
+    ``kw in query`` per keyword; each intent scores its distinct keywords
+    found, and ties go to the intent listed first, as before.
+    """
+    
+    def __init__(self, terms: Dict[str, list] = INTENT_TERMS, default: str = DEFAULT_INTENT):
+        self.intents = list(terms)
+        self.default = default
+        self.lookup = {term: intent for intent, words in terms.items() for term in words}
+        # A position reports one keyword; keep no keyword a prefix of another
+        # or the shorter one would be missed where both start.
+        if any(a != b and b.startswith(a) for a in self.lookup for b in self.lookup):
+            raise ValueError("Intent keywords must not be prefixes of one another")
+        alternation = '|'.join(re.escape(term) for term in self.lookup)
+        self.pattern = re.compile(f'(?=({alternation}))')
+    
+    def scores(self, query: str) -> Dict[str, int]:
+        scores = dict.fromkeys(self.intents, 0)
+        for term in set(self.pattern.findall(query.lower())):
+            scores[self.lookup[term]] += 1
+        return scores
+    
+    def classify(self, query: str) -> str:
+        scores = self.scores(query)
+        best = max(self.intents, key=scores.__getitem__)
+        return best if scores[best] > 0 else self.default
+    
+    def select(self, query: str, min_score: int = 1) -> List[str]:
+        """Intents scoring at least ``min_score``, best first; the default if none do."""
+        scores = self.scores(query)
+        selected = sorted(
+            (intent for intent in self.intents if scores[intent] >= max(min_score, 1)),
+            key=lambda intent: -scores[intent]
+        )
+        return selected or [self.default]
+
+
 class AgentOrchestrator:
     """Routes queries to appropriate specialized agents."""
     
@@ -21,28 +82,30 @@ class AgentOrchestrator:
             'search': KnowledgeSearchAgent(snow_conn),
         }
         
-        self.intent_keywords = {
-            'load': ['load', 'demand', 'forecast', 'mw', 'consumption', 'usage'],
-            'price': ['price', 'lmp', 'cost', 'spike', 'congestion', 'spread'],
-            'weather': ['weather', 'temperature', 'wind', 'heat', 'cold', 'storm'],
-            'search': ['news', 'article', 'ferc', 'regulation', 'policy', 'rto'],
-        }
+        self.classifier = IntentClassifier()
+        self.executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix='agent')
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
     
     def classify_intent(self, query: str) -> str:
         """Classify user query intent to route to appropriate agent."""
-        query_lower = query.lower()
-        
-        scores = {}
-        for intent, keywords in self.intent_keywords.items():
-            scores[intent] = sum(1 for kw in keywords if kw in query_lower)
-        
-        if max(scores.values()) == 0:
-            return 'load'
-        
-        return max(scores, key=scores.get)
+        return self.classifier.classify(query)
     
-    async def process_query(self, query: str, context: Optional[str] = None) -> dict:
-        """Process a user query through the appropriate agent."""
+    async def process_query(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        fan_out: bool = False,
+        min_score: int = 1,
+        timeout: float = AGENT_TIMEOUT_SECONDS
+    ) -> dict:
+        """Process a user query through the appropriate agent, or every matching agent with ``fan_out``."""
+        if fan_out:
+            intents = self.classifier.select(query, min_score)
+            if len(intents) > 1:
+                return await self.fan_out(intents, query, context, timeout)
+        
         intent = self.classify_intent(query)
         agent = self.agents[intent]
         
@@ -55,3 +118,61 @@ class AgentOrchestrator:
             'data': response.get('data'),
             'sources': response.get('sources', []),
         }
+    
+    async def _run_agent(self, intent: str, query: str, context: Optional[str], timeout: float) -> dict:
+        agent = self.agents[intent]
+        start = time.perf_counter()
+        # Agents issue blocking warehouse calls inside process(), so each one
+        # runs on its own event loop in a worker thread; otherwise gather
+        # would still execute them one after another.
+        task = asyncio.get_running_loop().run_in_executor(self.executor, asyncio.run, agent.process(query, context))
+        try:
+            response = await asyncio.wait_for(task, timeout)
+            status = 'ok'
+        except asyncio.TimeoutError:
+            response, status = None, 'timeout'
+        except Exception as e:
+            response, status = {'error': str(e)}, 'error'
+        return {
+            'intent': intent,
+            'agent': agent.name,
+            'status': status,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            'response': response,
+        }
+    
+    async def fan_out(
+        self,
+        intents: List[str],
+        query: str,
+        context: Optional[str] = None,
+        timeout: float = AGENT_TIMEOUT_SECONDS
+    ) -> dict:
+        """Run several agents concurrently and merge whatever finished within ``timeout``."""
+        if not 0 < timeout <= MAX_AGENT_TIMEOUT_SECONDS:
+            raise ValueError(f"timeout must be in (0, {MAX_AGENT_TIMEOUT_SECONDS:g}] seconds")
+        results = await asyncio.gather(*(self._run_agent(intent, query, context, timeout) for intent in intents))
+        
+        sections, data, sources = [], {}, []
+        for result in results:
+            response = result['response']
+            if result['status'] == 'ok':
+                sections.append(f"### {result['agent']}\n\n{response['answer']}")
+                data[result['intent']] = response.get('data')
+                for source in response.get('sources', []):
+                    if source not in sources:
+                        sources.append(source)
+            elif result['status'] == 'timeout':
+                sections.append(f"### {result['agent']}\n\n_No response within {timeout:g}s; omitted from this answer._")
+            else:
+                sections.append(f"### {result['agent']}\n\n_Failed: {response['error']}_")
+        
+        return {
+            'intent': intents[0],
+            'intents': intents,
+            'agent': ', '.join(result['agent'] for result in results),
+            'response': '\n\n'.join(sections),
+            'data': data,
+            'sources': sources,
+            'agents': [{k: v for k, v in result.items() if k != 'response'} for result in results],
+        }
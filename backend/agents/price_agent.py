@@ -1,6 +1,7 @@
 """Price Analyst Agent - Specialized agent for price and congestion analysis."""
 
 from typing import Optional
+from backend.services.agent_cache import HIDDEN_PATTERN_TABLE, PRICE_ANOMALY_TABLE, get_agent_cache
 
 class PriceAnalystAgent:
     """Agent specialized in LMP analysis and price anomaly detection."""
@@ -8,26 +9,36 @@ class PriceAnalystAgent:
     name = "Price Analyst Agent"
     description = "Analyzes electricity prices, congestion patterns, and price anomalies"
     
-    def __init__(self, snow_conn):
-        self.snow_conn = snow_conn
-    
-    async def process(self, query: str, context: Optional[str] = None) -> dict:
-        """Process a price-related query."""
-        cursor = self.snow_conn.cursor()
-        
-        cursor.execute("""
+    datasets = {
+        'anomaly_count_7d': (
+            """
             SELECT COUNT(*) AS ANOMALY_COUNT
             FROM POWER_UTILITIES_DB.ATOMIC.PRICE_ANOMALY_EVENT
             WHERE EVENT_START >= DATEADD('day', -7, CURRENT_DATE())
-        """)
-        anomaly_count = cursor.fetchone()[0]
-        
-        cursor.execute("""
+            """,
+            lambda rows: rows[0][0],
+            [PRICE_ANOMALY_TABLE]
+        ),
+        'hidden_patterns': (
+            """
             SELECT * FROM POWER_UTILITIES_DB.ML.HIDDEN_PATTERN
             WHERE STATUS != 'Template'
             LIMIT 3
-        """)
-        patterns = cursor.fetchall()
+            """,
+            list,
+            [HIDDEN_PATTERN_TABLE]
+        ),
+    }
+    
+    def __init__(self, snow_conn):
+        self.snow_conn = snow_conn
+    
+    async def process(self, query: str, context: Optional[str] = None) -> dict:
+        """Process a price-related query."""
+        # Both datasets come back from a single multi-statement round trip.
+        data = get_agent_cache().get_many(self.snow_conn, 'price', self.datasets)
+        anomaly_count = data['anomaly_count_7d']
+        patterns = data['hidden_patterns']
         
         answer = f"""**Price Analysis Summary:**
 
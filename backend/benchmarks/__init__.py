@@ -0,0 +1 @@
+"""Micro-benchmarks for the risk and forecasting models."""
@@ -0,0 +1,101 @@
+"""Benchmark chat intent classification: legacy per-keyword scan vs the single-pass matcher.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_intent [--corpus queries.txt]
+
+``--corpus`` takes logged chat messages, one per line. Without it a
+synthetic corpus is generated from query templates.
+"""
+
+import argparse
+import time
+import numpy as np
+
+from backend.agents.orchestrator import IntentClassifier
+
+
+LEGACY_KEYWORDS = {
+    'load': ['load', 'demand', 'forecast', 'mw', 'consumption', 'usage'],
+    'price': ['price', 'lmp', 'cost', 'spike', 'congestion', 'spread'],
+    'weather': ['weather', 'temperature', 'wind', 'heat', 'cold', 'storm'],
+    'search': ['news', 'article', 'ferc', 'regulation', 'policy', 'rto'],
+}
+
+TEMPLATES = [
+    "What is the {load} {when} in {zone}?",
+    "Show me {price} for {zone} {when}",
+    "How will the {weather} affect {load} {when}?",
+    "Any {search} about {topic}?",
+    "Why did {price} jump in {zone} {when} during the {weather}?",
+    "Summarize {search} on {topic} and {price}",
+    "Give me a morning brief for {zone}",
+    "Compare {zone} and {zone2} {price} {when}",
+]
+TERMS = {
+    'load': ['load', 'demand', 'load forecast', 'peak load', 'MW consumption', 'usage', 'megawatts'],
+    'price': ['prices', 'LMP', 'price spikes', 'congestion costs', 'DA/RT spread', 'basis'],
+    'weather': ['heat wave', 'temperatures', 'wind output', 'cold front', 'storm', 'humidity'],
+    'search': ['news', 'FERC orders', 'PUCT rules', 'regulatory filings', 'RTO policy', 'articles'],
+    'zone': ['Houston', 'North', 'South', 'West', 'ERCOT', 'the Panhandle'],
+    'when': ['today', 'tomorrow', 'this week', 'next summer', 'last August', 'right now'],
+    'topic': ['4CP', 'demand response', 'transmission charges', 'market design', 'storage'],
+}
+
+
+def legacy_classify(query: str) -> str:
+    query_lower = query.lower()
+    scores = {intent: sum(1 for kw in keywords if kw in query_lower)
+              for intent, keywords in LEGACY_KEYWORDS.items()}
+    if max(scores.values()) == 0:
+        return 'load'
+    return max(scores, key=scores.get)
+
+
+def synthetic_corpus(n: int, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    pick = lambda key: TERMS[key][rng.integers(len(TERMS[key]))]
+    queries = []
+    for _ in range(n):
+        template = TEMPLATES[rng.integers(len(TEMPLATES))]
+        queries.append(template.format(
+            load=pick('load'), price=pick('price'), weather=pick('weather'), search=pick('search'),
+            zone=pick('zone'), zone2=pick('zone'), when=pick('when'), topic=pick('topic'),
+        ))
+    return queries
+
+
+def time_classifier(classify, queries: list, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            classify(query)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default=None)
+    parser.add_argument('-n', type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = synthetic_corpus(args.n)
+
+    classifier = IntentClassifier()
+    legacy = time_classifier(legacy_classify, queries)
+    compiled = time_classifier(classifier.classify, queries)
+    agree = np.mean([legacy_classify(q) == classifier.classify(q) for q in queries])
+
+    print(f"{len(queries)} queries")
+    print(f"legacy substring scan: {legacy * 1e6 / len(queries):6.2f} us/query")
+    print(f"single-pass matcher:   {compiled * 1e6 / len(queries):6.2f} us/query")
+    print(f"agreement with legacy: {agree:.1%}")
+
+
+if __name__ == '__main__':
+    main()
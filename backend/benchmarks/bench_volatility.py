@@ -0,0 +1,132 @@
+"""Benchmark the model work done by /api/risk/volatility/{zone}, before and after memoization.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_volatility
+"""
+
+import time
+import numpy as np
+import pandas as pd
+
+from backend.models.garch import fit_garch, garch_filter, garch_forecast
+from backend.models.volatility import VolatilityAnalyzer
+
+
+def synthetic_prices(n: int = 2160, seed: int = 3) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    log_prices = np.log(40) + np.cumsum(rng.standard_t(4, n) * 0.03)
+    return pd.Series(np.exp(log_prices), index=pd.date_range('2025-01-01', periods=n, freq='h'))
+
+
+class BaselineVolatilityAnalyzer:
+    """VolatilityAnalyzer as it was before memoization: every call recomputes its series."""
+
+    def __init__(self, prices: pd.Series, cache_key=None):
+        self.prices = prices.copy()
+        self.cache_key = cache_key
+        self.returns = self.prices.pct_change().dropna()
+        self.returns = self.returns.replace([np.inf, -np.inf], np.nan).dropna()
+        self.log_returns = np.log(self.prices / self.prices.shift(1)).replace(
+            [np.inf, -np.inf], np.nan
+        ).dropna()
+
+    def historical_volatility(self, window: int = 24) -> pd.Series:
+        return self.returns.rolling(window=window).std() * np.sqrt(8760)
+
+    def ewma_volatility(self, lambda_param: float = 0.94) -> pd.Series:
+        return np.sqrt((self.returns ** 2).ewm(alpha=1 - lambda_param).mean()) * np.sqrt(8760)
+
+    def fit_garch(self) -> dict:
+        omega, alpha, beta = fit_garch(self.returns.dropna().values, self.cache_key)
+        persistence = alpha + beta
+        return {
+            'omega': omega,
+            'alpha': alpha,
+            'beta': beta,
+            'persistence': persistence,
+            'long_run_volatility': float(np.sqrt(omega / (1 - persistence) * 8760)) if persistence < 1 else None
+        }
+
+    def garch_estimate(self) -> pd.Series:
+        returns_clean = self.returns.dropna()
+        if len(returns_clean) == 0:
+            return pd.Series()
+        fitted = self.fit_garch()
+        sigma2 = garch_filter(returns_clean.values, fitted['omega'], fitted['alpha'], fitted['beta'])
+        return pd.Series(np.sqrt(sigma2) * np.sqrt(8760), index=returns_clean.index)
+
+    def garch_forecast(self, horizon: int = 24) -> pd.Series:
+        returns_clean = self.returns.dropna()
+        fitted = self.fit_garch()
+        omega, alpha, beta = fitted['omega'], fitted['alpha'], fitted['beta']
+        sigma2 = garch_filter(returns_clean.values, omega, alpha, beta)
+        forecast = garch_forecast(returns_clean.values[-1], sigma2[-1], omega, alpha, beta, horizon)
+        index = pd.date_range(returns_clean.index[-1], periods=horizon + 1, freq='h')[1:]
+        return pd.Series(np.sqrt(forecast) * np.sqrt(8760), index=index)
+
+    def get_summary(self) -> dict:
+        return {
+            'current_historical': float(self.historical_volatility().iloc[-1]) if len(self.historical_volatility()) > 0 else None,
+            'current_ewma': float(self.ewma_volatility().iloc[-1]) if len(self.ewma_volatility()) > 0 else None,
+            'current_garch': float(self.garch_estimate().iloc[-1]) if len(self.garch_estimate()) > 0 else None,
+            'mean_return': float(self.returns.mean()),
+            'return_std': float(self.returns.std()),
+            'skewness': float(self.returns.skew()),
+            'kurtosis': float(self.returns.kurtosis())
+        }
+
+
+def baseline_route_work(prices: pd.Series) -> dict:
+    """The model calls get_volatility made before memoization, including its per-point loop."""
+    analyzer = BaselineVolatilityAnalyzer(prices, cache_key='BENCH')
+    summary = analyzer.get_summary()
+
+    hist_vol = analyzer.historical_volatility()
+    ewma_vol = analyzer.ewma_volatility()
+    garch_vol = analyzer.garch_estimate()
+    recent_vol = []
+    for i in range(-min(168, len(hist_vol)), 0):
+        recent_vol.append({
+            'datetime': str(hist_vol.index[i]),
+            'historical': float(hist_vol.iloc[i]) if not np.isnan(hist_vol.iloc[i]) else None,
+            'ewma': float(ewma_vol.iloc[i]) if not np.isnan(ewma_vol.iloc[i]) else None,
+            'garch': float(garch_vol.iloc[i]) if not np.isnan(garch_vol.iloc[i]) else None,
+        })
+
+    analyzer.garch_forecast(24)
+    analyzer.fit_garch()
+    return summary
+
+
+def route_model_work(prices: pd.Series) -> dict:
+    """Mirror the model calls made by get_volatility in backend/routes/risk.py."""
+    analyzer = VolatilityAnalyzer(prices, cache_key='BENCH')
+    summary = analyzer.get_summary()
+
+    analyzer.volatility_series(168)
+    analyzer.garch_forecast(24)
+    analyzer.fit_garch()
+    return summary
+
+
+def timed(fn, prices: pd.Series, repeat: int) -> float:
+    fn(prices)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(prices)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(repeat: int = 20):
+    for days in (90, 365, 1825):
+        prices = synthetic_prices(days * 24)
+        before = timed(baseline_route_work, prices, repeat)
+        after = timed(route_model_work, prices, repeat)
+        print(f"{days:>5} days ({len(prices):>6} prices): "
+              f"before {before:8.2f} ms  after {after:8.2f} ms  ({before / after:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
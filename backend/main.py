@@ -37,7 +37,14 @@ def get_snowflake_connection():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.snow_conn = get_snowflake_connection()
+    # Memory-map the empirical 4CP table once, if it has been built.
+    from backend.models.fourcp_table import get_fourcp_table
+    get_fourcp_table()
+    # One orchestrator (and one set of agents) for the app's lifetime.
+    from backend.agents.orchestrator import AgentOrchestrator
+    app.state.orchestrator = AgentOrchestrator(app.state.snow_conn)
     yield
+    app.state.orchestrator.close()
     app.state.snow_conn.close()
 
 app = FastAPI(
@@ -1,15 +1,34 @@
 """Risk and forecasting models refactored from notebooks."""
 
 from .volatility import VolatilityAnalyzer
+from .volatility_state import VolatilityState
+from .correlation import MultiAssetVolatilityAnalyzer
 from .var_calculator import VaRCalculator
-from .stress_tester import StressTester
+from .var_backtest import VaRBacktester
+from .streaming_var import StreamingVaRTracker
+from .portfolio_var import PortfolioVaRCalculator
+from .stress_tester import StressTester, HistoricalWindowLibrary
 from .monte_carlo import MonteCarloSimulator
 from .peak_predictor import PeakPredictor
+from .fourcp_table import FourCPTable
+from .fourcp_season import FourCPSeasonSimulator
+from .physics_features import PhysicsFeaturePipeline
+from .dr_optimizer import DRScheduleOptimizer
 
 __all__ = [
     'VolatilityAnalyzer',
+    'VolatilityState',
+    'MultiAssetVolatilityAnalyzer',
     'VaRCalculator', 
+    'VaRBacktester',
+    'StreamingVaRTracker',
+    'PortfolioVaRCalculator',
     'StressTester',
+    'HistoricalWindowLibrary',
     'MonteCarloSimulator',
-    'PeakPredictor'
+    'PeakPredictor',
+    'FourCPTable',
+    'FourCPSeasonSimulator',
+    'PhysicsFeaturePipeline',
+    'DRScheduleOptimizer'
 ]
@@ -0,0 +1,129 @@
+"""Cross-zone volatility and correlation matrices over many settlement points."""
+
+import numpy as np
+import pandas as pd
+from math import gcd
+from scipy import signal
+from typing import Dict
+
+
+class MultiAssetVolatilityAnalyzer:
+    """
+    Rolling and EWMA covariance for N settlement points, evaluated every
+    ``step`` hours. Outer products r_t r_t^T are summed per block of
+    gcd(window, step) hours in one einsum, so the history is built from
+    (T / block) x N x N tensors rather than a per-hour loop.
+    """
+
+    def __init__(self, prices: pd.DataFrame):
+        prices = prices.sort_index().where(prices > 0).ffill()
+        returns = prices.pct_change().replace([np.inf, -np.inf], np.nan)
+        self.returns = returns.dropna()
+        self.assets = list(self.returns.columns)
+
+    def _blocks(self, block: int):
+        values = self.returns.values
+        n_blocks = len(values) // block
+        offset = len(values) - n_blocks * block
+        # Align blocks to the end so the latest hour is always a grid point.
+        blocked = values[offset:].reshape(n_blocks, block, len(self.assets))
+        ends = self.returns.index[offset + block - 1::block]
+        return blocked, ends
+
+    def rolling_covariance(self, window: int = 168, step: int = 24):
+        block = gcd(window, step)
+        blocked, ends = self._blocks(block)
+        if len(blocked) * block < window:
+            return np.empty((0, len(self.assets), len(self.assets))), ends[:0]
+
+        s1 = np.cumsum(blocked.sum(axis=1), axis=0)
+        s2 = np.cumsum(np.einsum('bti,btj->bij', blocked, blocked), axis=0)
+        s1 = np.concatenate([np.zeros((1,) + s1.shape[1:]), s1])
+        s2 = np.concatenate([np.zeros((1,) + s2.shape[1:]), s2])
+
+        lag = window // block
+        stride = step // block
+        last = len(blocked)
+        points = np.arange(last, lag - 1, -stride)[::-1]
+        w1 = s1[points] - s1[points - lag]
+        w2 = s2[points] - s2[points - lag]
+        cov = (w2 - np.einsum('ki,kj->kij', w1, w1) / window) / (window - 1)
+        return cov, ends[points - 1]
+
+    def ewma_covariance(self, lambda_param: float = 0.94, step: int = 24):
+        blocked, ends = self._blocks(step)
+        if len(blocked) == 0:
+            return np.empty((0, len(self.assets), len(self.assets))), ends
+
+        # Within a block, weight hour k (0-based) by lambda^(step-1-k); blocks
+        # then combine through a first-order filter with factor lambda^step.
+        weights = lambda_param ** np.arange(step - 1, -1, -1)
+        block_sums = np.einsum('t,bti,btj->bij', weights, blocked, blocked)
+        decayed = signal.lfilter([1.0], [1.0, -lambda_param ** step], block_sums, axis=0)
+        # Normalise by the accumulated weight, as pandas ewm(adjust=True) does.
+        n_obs = step * np.arange(1, len(blocked) + 1)
+        norm = (1 - lambda_param ** n_obs) / (1 - lambda_param)
+        return decayed / norm[:, None, None], ends
+
+    @staticmethod
+    def to_correlation(cov: np.ndarray) -> np.ndarray:
+        sd = np.sqrt(np.maximum(np.diagonal(cov, axis1=-2, axis2=-1), 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / (sd[..., :, None] * sd[..., None, :])
+        return np.clip(corr, -1.0, 1.0)
+
+    @staticmethod
+    def to_volatility(cov: np.ndarray) -> np.ndarray:
+        return np.sqrt(np.maximum(np.diagonal(cov, axis1=-2, axis2=-1), 0.0)) * np.sqrt(8760)
+
+    def get_correlation_summary(
+        self,
+        window: int = 168,
+        lambda_param: float = 0.94,
+        step: int = 24,
+        history_points: int = 30
+    ) -> Dict:
+        rolling_cov, rolling_ends = self.rolling_covariance(window, step)
+        ewma_cov, ewma_ends = self.ewma_covariance(lambda_param, step)
+
+        def matrix(values):
+            return [[float(v) if np.isfinite(v) else None for v in row] for row in values]
+
+        def vector(values):
+            return {a: (float(v) if np.isfinite(v) else None) for a, v in zip(self.assets, values)}
+
+        rolling_corr = self.to_correlation(rolling_cov)
+        ewma_corr = self.to_correlation(ewma_cov)
+        rolling_vol = self.to_volatility(rolling_cov)
+        ewma_vol = self.to_volatility(ewma_cov)
+
+        return {
+            'assets': self.assets,
+            'observations': len(self.returns),
+            'window': window,
+            'lambda': lambda_param,
+            'step_hours': step,
+            'current': {
+                'datetime': str(self.returns.index[-1]) if len(self.returns) else None,
+                'rolling_correlation': matrix(rolling_corr[-1]) if len(rolling_corr) else None,
+                'ewma_correlation': matrix(ewma_corr[-1]) if len(ewma_corr) else None,
+                'rolling_volatility': vector(rolling_vol[-1]) if len(rolling_vol) else None,
+                'ewma_volatility': vector(ewma_vol[-1]) if len(ewma_vol) else None,
+            },
+            'rolling_history': [
+                {
+                    'datetime': str(ts),
+                    'correlation': matrix(rolling_corr[i]),
+                    'volatility': vector(rolling_vol[i])
+                }
+                for i, ts in list(enumerate(rolling_ends))[-history_points:]
+            ],
+            'ewma_history': [
+                {
+                    'datetime': str(ts),
+                    'correlation': matrix(ewma_corr[i]),
+                    'volatility': vector(ewma_vol[i])
+                }
+                for i, ts in list(enumerate(ewma_ends))[-history_points:]
+            ],
+        }
@@ -0,0 +1,202 @@
+"""Optimal demand-response curtailment schedules against hourly 4CP probabilities."""
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+
+FOURCP_INTERVALS = 4
+# The DP holds hours x facilities x (max_events + 1) arrays; these keep a
+# request within a June-September season and a few hundred MB.
+MAX_SCHEDULE_HOURS = 24 * 122
+MAX_EVENTS = 20
+MAX_FACILITIES = 100
+
+
+def interval_value(capacity_mw, transmission_rate: float = 85.0):
+    """Savings from being curtailed in one 4CP interval, consistent with PeakPredictor.calculate_dr_value."""
+    return np.asarray(capacity_mw, dtype=np.float64) * transmission_rate * 12 / FOURCP_INTERVALS
+
+
+def monthly_normalized(index: pd.DatetimeIndex, probability: np.ndarray) -> np.ndarray:
+    """
+    Scale each calendar month's hourly curve so it sums to at most one: a
+    month has a single 4CP interval, so P(hour is the interval) cannot add
+    up to more. Heuristic scores would otherwise count the same interval
+    many times over.
+    """
+    probability = np.array(probability, dtype=np.float64, ndmin=2)
+    months = index.to_period('M')
+    for month in months.unique():
+        cols = np.flatnonzero(months == month)
+        total = probability[:, cols].sum(axis=1, keepdims=True)
+        probability[:, cols] /= np.maximum(total, 1.0)
+    return probability
+
+
+class DRScheduleOptimizer:
+    """
+    Chooses curtailment events (contiguous runs of 1..max_event_hours hours,
+    at most max_events of them, separated by at least min_rest_hours) that
+    maximise sum(probability x interval value - hourly cost).
+
+    The DP runs forward over hours; each step updates every facility and
+    every event count at once, so the Python loop is over hours only.
+    F[t, f, e] is the best value with e events placed such that a new event
+    may start at hour t.
+    """
+
+    def __init__(self, max_events: int = 10, max_event_hours: int = 4, min_rest_hours: int = 0):
+        if not 0 <= max_events <= MAX_EVENTS:
+            raise ValueError(f"max_events must be between 0 and {MAX_EVENTS}")
+        self.max_events = max_events
+        self.max_event_hours = max_event_hours
+        self.min_rest_hours = min_rest_hours
+
+    def optimize(
+        self,
+        probability: np.ndarray,
+        capacity_mw,
+        transmission_rate: float = 85.0,
+        cost_per_mwh=0.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        ``probability`` is hours or facilities x hours; ``capacity_mw`` is per
+        facility and ``cost_per_mwh`` broadcasts to facilities x hours.
+        """
+        probability = np.atleast_2d(np.asarray(probability, dtype=np.float64))
+        capacity = np.atleast_1d(np.asarray(capacity_mw, dtype=np.float64))
+        n_fac = max(probability.shape[0], len(capacity))
+        probability = np.broadcast_to(probability, (n_fac, probability.shape[1]))
+        capacity = np.broadcast_to(capacity, (n_fac,))
+        T = probability.shape[1]
+        if T > MAX_SCHEDULE_HOURS or n_fac > MAX_FACILITIES:
+            raise ValueError(f"At most {MAX_SCHEDULE_HOURS} hours and {MAX_FACILITIES} facilities per schedule")
+        E, L, R = self.max_events, self.max_event_hours, self.min_rest_hours
+
+        cost = np.broadcast_to(np.asarray(cost_per_mwh, dtype=np.float64), (n_fac, T)) * capacity[:, None]
+        savings = probability * interval_value(capacity, transmission_rate)[:, None]
+        value = savings - cost
+
+        # Prefix sums padded past the horizon with -inf, so events cannot overrun T.
+        padded = np.concatenate([value, np.full((n_fac, L), -np.inf)], axis=1)
+        prefix = np.concatenate([np.zeros((n_fac, 1)), np.cumsum(padded, axis=1)], axis=1)
+
+        size = T + L + R + 1
+        # Time-major so each step reads and writes contiguous slices.
+        F = np.full((size, n_fac, E + 1), -np.inf)
+        F[0, :, 0] = 0.0
+        # Back-pointers: the start hour and length of the event that produced
+        # F[t, f, e]; length 0 means the value was carried from t - 1.
+        src_start = np.zeros((size, n_fac, E + 1), dtype=np.int32)
+        src_len = np.zeros((size, n_fac, E + 1), dtype=np.int16)
+        lengths = np.arange(1, L + 1)[:, None, None]
+
+        for t in range(size):
+            if t > 0:
+                carry = F[t - 1] >= F[t]
+                np.copyto(F[t], F[t - 1], where=carry)
+                src_len[t][carry] = 0
+            if t >= T or E == 0:
+                continue
+            # Events of every length starting at t, for every event count.
+            block = (prefix[:, t + 1:t + L + 1] - prefix[:, t:t + 1]).T
+            cand = F[t, :, :-1][None, :, :] + block[:, :, None]
+            current = F[t + 1 + R:t + L + 1 + R, :, 1:]
+            better = cand > current
+            np.copyto(current, cand, where=better)
+            np.copyto(src_start[t + 1 + R:t + L + 1 + R, :, 1:], t, where=better)
+            np.copyto(src_len[t + 1 + R:t + L + 1 + R, :, 1:], lengths, where=better)
+
+        final = size - 1
+        best_events = np.argmax(F[final], axis=1)
+        best_value = F[final, np.arange(n_fac), best_events]
+
+        # Backtrack all facilities together.
+        curtail = np.zeros((n_fac, T), dtype=bool)
+        event_id = np.full((n_fac, T), -1, dtype=np.int32)
+        pos = np.full(n_fac, final)
+        e = best_events.copy()
+        rows = np.arange(n_fac)
+        while True:
+            active = (pos > 0) & (e > 0)
+            if not active.any():
+                break
+            f = rows[active]
+            length = src_len[pos[active], f, e[active]].astype(np.int64)
+            start = src_start[pos[active], f, e[active]].astype(np.int64)
+            is_event = length > 0
+            for k in range(L):
+                sel = is_event & (k < length)
+                curtail[f[sel], start[sel] + k] = True
+                event_id[f[sel], start[sel] + k] = e[active][sel] - 1
+            new_pos = np.where(is_event, start, pos[active] - 1)
+            e[f[is_event]] -= 1
+            pos[active] = new_pos
+
+        return {
+            'curtail': curtail,
+            'event_id': event_id,
+            'n_events': best_events,
+            'net_value': best_value,
+            'expected_savings': (savings * curtail).sum(axis=1),
+            'curtailment_cost': (cost * curtail).sum(axis=1),
+            'hourly_value': value,
+        }
+
+    def get_schedules(
+        self,
+        index: pd.DatetimeIndex,
+        probability: np.ndarray,
+        facilities: list,
+        transmission_rate: float = 85.0
+    ) -> list:
+        """
+        ``facilities`` are dicts with name, capacity_mw and optional cost_per_mwh.
+        Curves are normalised per month first, and expected savings are capped
+        at one interval per month covered. Facility and event net values use
+        the capped savings (event savings scaled by the same factor); the
+        DP's objective is reported as ``uncapped_net_value``.
+        """
+        capacity = np.array([f['capacity_mw'] for f in facilities], dtype=np.float64)
+        probability = monthly_normalized(index, np.broadcast_to(np.atleast_2d(probability), (len(facilities), len(index))))
+        n_months = len(index.to_period('M').unique())
+        cost = np.array([f.get('cost_per_mwh', 0.0) for f in facilities], dtype=np.float64)[:, None]
+        result = self.optimize(probability, capacity, transmission_rate, cost)
+
+        schedules = []
+        for i, facility in enumerate(facilities):
+            max_savings = float(interval_value(capacity[i], transmission_rate) * min(n_months, FOURCP_INTERVALS))
+            uncapped = float(result['expected_savings'][i])
+            expected = min(uncapped, max_savings)
+            scale = expected / uncapped if uncapped > 0 else 1.0
+            hourly_savings = probability[i] * interval_value(capacity[i], transmission_rate)
+            hourly_cost = cost[i, 0] * capacity[i]
+
+            ids = result['event_id'][i]
+            events = []
+            for event in np.unique(ids[ids >= 0]):
+                hours = np.flatnonzero(ids == event)
+                events.append({
+                    'start': str(index[hours[0]]),
+                    'end': str(index[hours[-1]]),
+                    'hours': int(len(hours)),
+                    'net_value': float(hourly_savings[hours].sum() * scale - hourly_cost * len(hours)),
+                })
+            # calculate_dr_value with the curve's expected share of 4CP intervals.
+            naive = float(capacity[i] * transmission_rate * 12 *
+                          min(1.0, probability[i].sum() / FOURCP_INTERVALS))
+            schedules.append({
+                'name': facility.get('name', f'facility_{i}'),
+                'capacity_mw': float(capacity[i]),
+                'cost_per_mwh': float(cost[i, 0]),
+                'events': events,
+                'curtailed_hours': int(result['curtail'][i].sum()),
+                'expected_savings': expected,
+                'max_savings': max_savings,
+                'curtailment_cost': float(result['curtailment_cost'][i]),
+                'net_value': expected - float(result['curtailment_cost'][i]),
+                'uncapped_net_value': float(result['net_value'][i]),
+                'unconstrained_expected_savings': naive,
+            })
+        return schedules
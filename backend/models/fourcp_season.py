@@ -0,0 +1,278 @@
+"""Season-long 4CP Monte Carlo: chance each remaining day sets its month's system peak."""
+
+import json
+from collections import OrderedDict
+import os
+import numpy as np
+import pandas as pd
+from scipy import signal
+from typing import Dict, Optional, Sequence
+
+from .fourcp_table import FOURCP_TABLE_MONTHS, fourcp_table_path
+
+
+# Days of hourly load materialised at once; the float64 intermediates are
+# n_scenarios x SIMULATION_DAY_CHUNK x 24 rather than the whole season.
+SIMULATION_DAY_CHUNK = 8
+
+
+def _ar1_paths(rng, phi: float, z0: np.ndarray, n_days: int) -> np.ndarray:
+    """Standardised AR(1) paths (scenarios x days) continuing from z0."""
+    shocks = rng.standard_normal((len(z0), n_days)) * np.sqrt(1 - phi ** 2)
+    return signal.lfilter([1.0], [1.0, -phi], shocks, axis=1, zi=(phi * z0)[:, None])[0]
+
+
+def _lag1_corr(values: np.ndarray, consecutive: np.ndarray) -> float:
+    if consecutive.sum() < 3:
+        return 0.0
+    corr = np.corrcoef(values[1:][consecutive], values[:-1][consecutive])[0, 1]
+    return float(np.clip(np.nan_to_num(corr), 0.0, 0.99))
+
+
+class FourCPSeasonModel:
+    """
+    Daily-max temperature follows a monthly climatology with AR(1) anomalies
+    and a fixed diurnal shape; hourly load is a per-hour regression on
+    cooling degrees and year, plus an AR(1) daily shock and hourly noise.
+    """
+
+    def __init__(self, params: Dict):
+        self.params = params
+        self.temp_mean = np.full(13, np.nan)
+        self.temp_std = np.full(13, np.nan)
+        for month, (mean, std) in params['temp_climatology'].items():
+            self.temp_mean[int(month)] = mean
+            self.temp_std[int(month)] = std
+        self.temp_phi = params['temp_phi']
+        self.diurnal_drop = np.asarray(params['diurnal_drop'])
+        self.load_coef = np.asarray(params['load_coef'])
+        self.base_year = params['base_year']
+        self.shock_std = params['shock_std']
+        self.shock_phi = params['shock_phi']
+        self.hourly_std = np.asarray(params['hourly_std'])
+
+    @classmethod
+    def from_history(cls, history: pd.DataFrame) -> 'FourCPSeasonModel':
+        """``history`` holds hourly DATETIME, LOAD_MW (system total) and TEMP_F."""
+        df = history.dropna(subset=['LOAD_MW', 'TEMP_F']).copy()
+        df['DATETIME'] = pd.to_datetime(df['DATETIME'])
+        df = df[df['DATETIME'].dt.month.isin(FOURCP_TABLE_MONTHS)]
+        df['DATE'] = df['DATETIME'].dt.normalize()
+        df['HOUR'] = df['DATETIME'].dt.hour
+
+        # Complete days only, as days x 24 matrices.
+        temp = df.pivot_table(index='DATE', columns='HOUR', values='TEMP_F').reindex(columns=range(24))
+        load = df.pivot_table(index='DATE', columns='HOUR', values='LOAD_MW').reindex(columns=range(24))
+        complete = temp.notna().all(axis=1) & load.notna().all(axis=1)
+        temp, load = temp[complete], load[complete]
+        dates = temp.index
+        consecutive = np.diff(dates.values).astype('timedelta64[D]').astype(int) == 1
+
+        tmax = temp.max(axis=1)
+        months = dates.month
+        climatology = tmax.groupby(months).agg(['mean', 'std'])
+        z = ((tmax - climatology['mean'].reindex(months).values) /
+             climatology['std'].reindex(months).values).values
+
+        years = (dates.year - dates.year.min()).values.astype(np.float64)
+        cdd = np.maximum(temp.values - 65, 0.0)
+        coef = np.empty((24, 3))
+        residuals = np.empty(load.shape)
+        for h in range(24):
+            X = np.column_stack([np.ones(len(dates)), cdd[:, h], years])
+            coef[h] = np.linalg.lstsq(X, load.values[:, h], rcond=None)[0]
+            residuals[:, h] = load.values[:, h] - X @ coef[h]
+        shock = residuals.mean(axis=1)
+
+        return cls({
+            'temp_climatology': {int(m): [float(r['mean']), float(r['std'])] for m, r in climatology.iterrows()},
+            'temp_phi': _lag1_corr(z, consecutive),
+            'diurnal_drop': (tmax.values[:, None] - temp.values).mean(axis=0).tolist(),
+            'load_coef': coef.tolist(),
+            'base_year': int(dates.year.min()),
+            'shock_std': float(shock.std()),
+            'shock_phi': _lag1_corr(shock, consecutive),
+            'hourly_std': (residuals - shock[:, None]).std(axis=0).tolist(),
+            'days': int(len(dates)),
+            'start': str(dates.min()),
+            'end': str(dates.max()),
+        })
+
+    def simulate_days(
+        self,
+        dates: pd.DatetimeIndex,
+        z0: np.ndarray,
+        u0: np.ndarray,
+        rng: np.random.Generator
+    ) -> Dict[str, np.ndarray]:
+        """Daily temperature anomaly, load shock and daily max load, each scenarios x days."""
+        n_scenarios = len(z0)
+        z = _ar1_paths(rng, self.temp_phi, z0, len(dates))
+        u = _ar1_paths(rng, self.shock_phi, u0 / self.shock_std if self.shock_std else u0, len(dates)) * self.shock_std
+        day_max = np.empty((n_scenarios, len(dates)), dtype=np.float32)
+        for start in range(0, len(dates), SIMULATION_DAY_CHUNK):
+            days = slice(start, start + SIMULATION_DAY_CHUNK)
+            day_max[:, days] = self.hourly_load(dates[days], z[:, days], u[:, days], rng, n_scenarios).max(axis=2)
+        return {'z': z, 'u': u, 'day_max': day_max}
+
+    def hourly_load(
+        self,
+        dates: pd.DatetimeIndex,
+        z: np.ndarray,
+        u: np.ndarray,
+        rng: np.random.Generator,
+        n_scenarios: int,
+        hours: Sequence[int] = range(24)
+    ) -> np.ndarray:
+        hours = np.asarray(hours)
+        months = dates.month.values
+        tmax = self.temp_mean[months] + self.temp_std[months] * z
+        temp = tmax[:, :, None] - self.diurnal_drop[hours]
+        cdd = np.maximum(temp - 65, 0.0)
+        years = (dates.year.values - self.base_year).astype(np.float64)
+        coef = self.load_coef[hours]
+        noise = rng.standard_normal((n_scenarios, len(dates), len(hours))) * self.hourly_std[hours]
+        return (coef[:, 0] + coef[:, 1] * cdd + coef[:, 2] * years[None, :, None] +
+                u[:, :, None] + noise).astype(np.float32)
+
+    def to_dict(self) -> Dict:
+        return self.params
+
+    def save(self, path: str):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.params, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['FourCPSeasonModel']:
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+class FourCPSeasonSimulator:
+    """
+    Days after today are simulated once per calendar day and their daily
+    maxima cached; an intraday refresh only draws today's remaining hours,
+    conditioned on the cached scenario's anomaly and shock for today.
+    """
+
+    def __init__(self, model: FourCPSeasonModel, n_scenarios: int = 2000, seed: int = 42):
+        self.model = model
+        self.n_scenarios = n_scenarios
+        self.seed = seed
+        self._day_cache: Optional[Dict] = None
+
+    def remaining_dates(self, today: pd.Timestamp) -> pd.DatetimeIndex:
+        season_end = pd.Timestamp(year=today.year, month=max(FOURCP_TABLE_MONTHS), day=1) + pd.offsets.MonthEnd(0)
+        dates = pd.date_range(today, season_end, freq='D')
+        return dates[dates.month.isin(FOURCP_TABLE_MONTHS)]
+
+    def _season_paths(self, today: pd.Timestamp) -> Dict:
+        if self._day_cache is not None and self._day_cache['date'] == today:
+            return self._day_cache
+        dates = self.remaining_dates(today)
+        rng = np.random.default_rng([self.seed, today.toordinal()])
+        # Start from the stationary distribution: nothing is known about today yet.
+        z0 = rng.standard_normal(self.n_scenarios)
+        u0 = rng.standard_normal(self.n_scenarios) * self.model.shock_std
+        paths = self.model.simulate_days(dates, z0, u0, rng)
+        self._day_cache = {
+            'date': today,
+            'dates': dates,
+            'z_today': paths['z'][:, 0],
+            'u_today': paths['u'][:, 0],
+            'future_max': paths['day_max'][:, 1:],
+        }
+        return self._day_cache
+
+    def simulate(
+        self,
+        now: pd.Timestamp,
+        prior_peak_mw: float = 0.0,
+        observed_today: Optional[Sequence[float]] = None
+    ) -> Dict:
+        """
+        ``prior_peak_mw`` is the current month's peak before today and
+        ``observed_today`` the hourly loads already seen today (hour 0 first).
+        """
+        now = pd.Timestamp(now)
+        today = now.normalize()
+        if today.month not in FOURCP_TABLE_MONTHS:
+            return {'date': str(today.date()), 'in_season': False, 'days': [], 'months': []}
+        paths = self._season_paths(today)
+        dates = paths['dates']
+
+        observed = np.asarray(observed_today if observed_today is not None else [], dtype=np.float64)
+        first_hour = min(len(observed), 24)
+        today_max = np.full(self.n_scenarios, observed.max() if len(observed) else -np.inf)
+        if first_hour < 24:
+            rng = np.random.default_rng([self.seed, today.toordinal(), first_hour])
+            remaining = self.model.hourly_load(
+                dates[:1], paths['z_today'][:, None], paths['u_today'][:, None],
+                rng, self.n_scenarios, range(first_hour, 24)
+            )
+            today_max = np.maximum(today_max, remaining[:, 0].max(axis=1))
+        day_max = np.column_stack([today_max, paths['future_max']])
+        expected_max = day_max.mean(axis=0)
+        max_p90 = np.quantile(day_max, 0.9, axis=0)
+
+        days = []
+        months = []
+        for month in pd.unique(dates.month):
+            cols = np.flatnonzero(dates.month == month)
+            prior = prior_peak_mw if month == today.month else 0.0
+            month_max = np.maximum(day_max[:, cols].max(axis=1), prior)
+            sets_peak = day_max[:, cols] >= month_max[:, None]
+            months.append({
+                'month': int(month),
+                'prior_peak_mw': float(prior),
+                'prob_peak_already_set': float(np.mean(prior >= day_max[:, cols].max(axis=1))),
+                'expected_peak_mw': float(month_max.mean()),
+                'peak_p90_mw': float(np.quantile(month_max, 0.9)),
+            })
+            for i, col in enumerate(cols):
+                days.append({
+                    'date': str(dates[col].date()),
+                    'month': int(month),
+                    'probability': float(sets_peak[:, i].mean()),
+                    'expected_max_mw': float(expected_max[col]),
+                    'max_p90_mw': float(max_p90[col]),
+                })
+
+        return {
+            'date': str(today.date()),
+            'in_season': True,
+            'n_scenarios': self.n_scenarios,
+            'observed_hours_today': int(first_hour),
+            'today_probability': days[0]['probability'],
+            'days': days,
+            'months': months,
+        }
+
+
+# Each simulator caches an n_scenarios x days matrix of daily maxima, so only
+# the most recently used scenario counts are kept.
+MAX_SEASON_SIMULATORS = 4
+_season_simulators: 'OrderedDict[int, FourCPSeasonSimulator]' = OrderedDict()
+
+
+def season_model_path() -> str:
+    return os.path.splitext(fourcp_table_path())[0] + '_season.json'
+
+
+def get_season_simulator(n_scenarios: int = 2000) -> Optional[FourCPSeasonSimulator]:
+    """Shared simulators per scenario count, or None when the model has not been built."""
+    if n_scenarios in _season_simulators:
+        _season_simulators.move_to_end(n_scenarios)
+        return _season_simulators[n_scenarios]
+    model = FourCPSeasonModel.load(season_model_path())
+    if model is None:
+        return None
+    _season_simulators[n_scenarios] = FourCPSeasonSimulator(model, n_scenarios)
+    while len(_season_simulators) > MAX_SEASON_SIMULATORS:
+        _season_simulators.popitem(last=False)
+    return _season_simulators[n_scenarios]
@@ -0,0 +1,136 @@
+"""Empirical 4CP probability table binned by month, hour, temperature and load ratio."""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+
+FOURCP_TABLE_MONTHS = [6, 7, 8, 9]
+TEMP_BIN_EDGES = [75, 80, 85, 90, 95, 100, 105]
+LOAD_RATIO_BIN_EDGES = [0.80, 0.85, 0.90, 0.93, 0.95, 0.97, 0.98, 0.99, 1.00]
+
+# Pseudo-counts pulling each level towards its parent:
+# cell -> (month, hour, load bin) -> (load bin) -> overall rate.
+SMOOTHING = (5.0, 10.0, 20.0)
+
+
+def _shrink(positives: np.ndarray, counts: np.ndarray, prior: np.ndarray, strength: float) -> np.ndarray:
+    return (positives + strength * prior) / (counts + strength)
+
+
+class FourCPTable:
+    """
+    P(hour is its month's 4CP interval | month, hour, temperature bin,
+    load-ratio bin). Load ratio is hourly system load over the average
+    monthly peak seen in the training history, which is stored with the
+    table so lookups use the same reference.
+    """
+
+    def __init__(self, probability: np.ndarray, metadata: Dict):
+        self.probability = probability
+        self.metadata = metadata
+        self.temp_edges = np.asarray(metadata['temp_bin_edges'], dtype=np.float64)
+        self.ratio_edges = np.asarray(metadata['load_ratio_bin_edges'], dtype=np.float64)
+        self.reference_peak = np.full(13, np.nan)
+        for month, peak in metadata['reference_peak_mw'].items():
+            self.reference_peak[int(month)] = peak
+        self.month_index = np.full(13, -1)
+        self.month_index[metadata['months']] = np.arange(len(metadata['months']))
+
+    @classmethod
+    def from_history(cls, history: pd.DataFrame) -> 'FourCPTable':
+        """``history`` holds hourly DATETIME, LOAD_MW (system total) and TEMP_F."""
+        history = history.dropna(subset=['LOAD_MW', 'TEMP_F'])
+        times = pd.DatetimeIndex(pd.to_datetime(history['DATETIME']))
+        in_season = np.isin(times.month, FOURCP_TABLE_MONTHS)
+        history = history[in_season]
+        times = times[in_season]
+        load = history['LOAD_MW'].values.astype(np.float64)
+
+        # Label each year-month's maximum hour as its 4CP interval.
+        year_month = (times.year * 12 + times.month).values
+        order = np.lexsort((-load, year_month))
+        first = np.concatenate(([True], np.diff(year_month[order]) != 0))
+        is_4cp = np.zeros(len(load), dtype=bool)
+        is_4cp[order[first]] = True
+
+        monthly_peaks = pd.Series(load[is_4cp], index=times.month[is_4cp])
+        reference = monthly_peaks.groupby(level=0).mean()
+        metadata = {
+            'months': FOURCP_TABLE_MONTHS,
+            'temp_bin_edges': TEMP_BIN_EDGES,
+            'load_ratio_bin_edges': LOAD_RATIO_BIN_EDGES,
+            'reference_peak_mw': {int(m): float(p) for m, p in reference.items()},
+            'hours': int(len(load)),
+            'events': int(is_4cp.sum()),
+            'start': str(times.min()) if len(times) else None,
+            'end': str(times.max()) if len(times) else None,
+            'smoothing': list(SMOOTHING),
+        }
+        table = cls(np.zeros(0), metadata)
+
+        m, h, t, r = table.bin_indices(load, history['TEMP_F'].values, times.hour.values, times.month.values)
+        shape = (len(FOURCP_TABLE_MONTHS), 24, len(TEMP_BIN_EDGES) + 1, len(LOAD_RATIO_BIN_EDGES) + 1)
+        flat = np.ravel_multi_index((m, h, t, r), shape)
+        counts = np.bincount(flat, minlength=np.prod(shape)).reshape(shape).astype(np.float64)
+        positives = np.bincount(flat, weights=is_4cp, minlength=np.prod(shape)).reshape(shape)
+
+        overall = positives.sum() / max(counts.sum(), 1.0)
+        ratio_p = _shrink(positives.sum(axis=(0, 1, 2)), counts.sum(axis=(0, 1, 2)), overall, SMOOTHING[2])
+        mhr_p = _shrink(positives.sum(axis=2), counts.sum(axis=2), ratio_p[None, None, :], SMOOTHING[1])
+        cell_p = _shrink(positives, counts, mhr_p[:, :, None, :], SMOOTHING[0])
+        table.probability = cell_p.astype(np.float32)
+        return table
+
+    def bin_indices(self, load_mw, temp_f, hour, month):
+        month = np.asarray(month, dtype=np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.asarray(load_mw, dtype=np.float64) / self.reference_peak[np.clip(month, 0, 12)]
+        return (
+            self.month_index[np.clip(month, 0, 12)],
+            np.asarray(hour, dtype=np.int64) % 24,
+            np.searchsorted(self.temp_edges, np.asarray(temp_f, dtype=np.float64), side='right'),
+            np.searchsorted(self.ratio_edges, np.nan_to_num(ratio), side='right'),
+        )
+
+    def lookup(self, load_mw, temp_f, hour, month) -> np.ndarray:
+        """Probability for each row; 0 outside the table's months."""
+        m, h, t, r = np.broadcast_arrays(*self.bin_indices(load_mw, temp_f, hour, month))
+        in_season = m >= 0
+        probability = np.zeros(m.shape)
+        probability[in_season] = self.probability[m[in_season], h[in_season], t[in_season], r[in_season]]
+        return probability
+
+    def save(self, path: str):
+        tmp_path = f'{path}.tmp.npy'
+        np.save(tmp_path, np.ascontiguousarray(self.probability, dtype=np.float32))
+        with open(f'{path}.json.tmp', 'w') as f:
+            json.dump(self.metadata, f)
+        os.replace(tmp_path, path)
+        os.replace(f'{path}.json.tmp', f'{path}.json')
+
+    @classmethod
+    def load(cls, path: str) -> Optional['FourCPTable']:
+        try:
+            probability = np.load(path, mmap_mode='r')
+            with open(f'{path}.json') as f:
+                return cls(probability, json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+_fourcp_table: Dict[str, Optional[FourCPTable]] = {}
+
+
+def fourcp_table_path() -> str:
+    return os.getenv('FOURCP_TABLE_PATH', os.path.join(os.path.dirname(__file__), '..', 'data', 'fourcp_table.npy'))
+
+
+def get_fourcp_table() -> Optional[FourCPTable]:
+    """The memory-mapped table, or None when it has not been built."""
+    path = fourcp_table_path()
+    if path not in _fourcp_table:
+        _fourcp_table[path] = FourCPTable.load(path)
+    return _fourcp_table[path]
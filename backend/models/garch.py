@@ -0,0 +1,149 @@
+"""GARCH(1,1) filtering, maximum-likelihood fitting and forecasting."""
+
+from collections import OrderedDict
+import numpy as np
+from scipy import optimize, signal
+from typing import Dict, Optional, Tuple
+
+from .var_calculator import returns_digest
+
+
+GARCH_FIT_CACHE_SIZE = 64
+DEFAULT_GARCH_PARAMS = (0.00001, 0.1, 0.85)
+# omega / sample variance, alpha + beta, alpha / (alpha + beta).
+GARCH_BOUNDS = [(1e-8, 10.0), (0.0, 0.9999), (0.0, 1.0)]
+
+# Converged (omega, alpha, beta) keyed by returns digest, plus the latest
+# converged fit per cache key (zone), the starting point of the next refit.
+_garch_fit_cache: 'OrderedDict[str, Tuple[float, float, float]]' = OrderedDict()
+_garch_fit_latest: Dict[str, Tuple[float, float, float]] = {}
+
+
+def garch_filter(
+    returns: np.ndarray,
+    omega: float,
+    alpha: float,
+    beta: float,
+    sigma2_0: Optional[float] = None
+) -> np.ndarray:
+    """sigma2[t] = omega + alpha * r[t-1]**2 + beta * sigma2[t-1], as a linear filter."""
+    n = len(returns)
+    if n == 0:
+        return np.empty(0)
+    x = np.empty(n)
+    x[0] = np.var(returns, ddof=1) if sigma2_0 is None else sigma2_0
+    x[1:] = omega + alpha * returns[:-1] ** 2
+    return signal.lfilter([1.0], [1.0, -beta], x)
+
+
+def garch_neg_loglik(params: np.ndarray, returns: np.ndarray, sigma2_0: float) -> float:
+    # Optimised as (omega in units of the sample variance, persistence,
+    # alpha's share of it) so that alpha + beta < 1 is a plain box bound and
+    # all three parameters share a scale for the finite-difference gradients.
+    omega, alpha, beta = _unpack(params, sigma2_0)
+    if alpha + beta >= 1:
+        return 1e20
+    sigma2 = garch_filter(returns, omega, alpha, beta, sigma2_0)
+    if np.any(sigma2 <= 0):
+        return 1e20
+    return 0.5 * float(np.sum(np.log(sigma2) + returns ** 2 / sigma2))
+
+
+def _unpack(params: np.ndarray, sigma2_0: float) -> Tuple[float, float, float]:
+    persistence, share = params[1], params[2]
+    return float(params[0] * sigma2_0), float(persistence * share), float(persistence * (1 - share))
+
+
+def _pack(omega: float, alpha: float, beta: float, sigma2_0: float) -> np.ndarray:
+    persistence = alpha + beta
+    share = alpha / persistence if persistence > 0 else 0.5
+    return np.array([omega / sigma2_0, persistence, share])
+
+
+def fit_garch_checked(
+    returns: np.ndarray,
+    cache_key: Optional[str] = None
+) -> Tuple[Tuple[float, float, float], bool]:
+    """
+    (omega, alpha, beta) and whether the fit converged. A fit counts as
+    converged when it is stationary and its likelihood is finite and no worse
+    than the starting point's; otherwise the last good fit for ``cache_key``
+    (or the defaults) is returned and nothing is cached.
+    """
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    previous = _garch_fit_latest.get(cache_key) if cache_key else None
+    fallback = previous if previous is not None else DEFAULT_GARCH_PARAMS
+    if len(returns) < 10:
+        return fallback, False
+
+    digest = returns_digest(returns)
+    params = _garch_fit_cache.get(digest)
+    if params is not None:
+        _garch_fit_cache.move_to_end(digest)
+        return params, True
+
+    sample_var = float(np.var(returns, ddof=1))
+    if not np.isfinite(sample_var) or sample_var <= 0:
+        return fallback, False
+    x0 = _pack(*(previous if previous is not None else (0.05 * sample_var, 0.1, 0.85)), sample_var)
+    f0 = garch_neg_loglik(x0, returns, sample_var)
+
+    best_x, best_f = None, np.inf
+    for method in ('L-BFGS-B', 'Nelder-Mead'):
+        result = optimize.minimize(
+            garch_neg_loglik,
+            x0,
+            args=(returns, sample_var),
+            method=method,
+            bounds=GARCH_BOUNDS,
+        )
+        if np.isfinite(result.fun) and result.fun < best_f:
+            best_x, best_f = result.x, float(result.fun)
+        # L-BFGS-B can stop at the start on a flat or penalised first step;
+        # only then is the slower simplex search worth running.
+        if best_f < min(f0, 1e20):
+            break
+
+    converged = best_x is not None and best_f < 1e20 and best_f <= f0
+    if converged:
+        params = _unpack(best_x, sample_var)
+        converged = params[1] + params[2] < 1
+    if not converged:
+        return fallback, False
+
+    _garch_fit_cache[digest] = params
+    if len(_garch_fit_cache) > GARCH_FIT_CACHE_SIZE:
+        _garch_fit_cache.popitem(last=False)
+    if cache_key:
+        _garch_fit_latest[cache_key] = params
+    return params, True
+
+
+def fit_garch(
+    returns: np.ndarray,
+    cache_key: Optional[str] = None
+) -> Tuple[float, float, float]:
+    return fit_garch_checked(returns, cache_key)[0]
+
+
+def garch_forecast(
+    last_return: float,
+    last_sigma2: float,
+    omega: float,
+    alpha: float,
+    beta: float,
+    horizon: int = 24
+) -> np.ndarray:
+    """Variance forecasts for steps 1..horizon, mean-reverting to omega / (1 - alpha - beta)."""
+    persistence = alpha + beta
+    next_sigma2 = omega + alpha * last_return ** 2 + beta * last_sigma2
+    steps = np.arange(horizon)
+    if persistence >= 1:
+        return next_sigma2 + omega * steps
+    long_run = omega / (1 - persistence)
+    return long_run + persistence ** steps * (next_sigma2 - long_run)
+
+
+def clear_garch_cache():
+    _garch_fit_cache.clear()
+    _garch_fit_latest.clear()
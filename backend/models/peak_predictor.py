@@ -2,9 +2,11 @@
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 
+from .fourcp_table import FourCPTable
+
 
 HISTORICAL_4CP_DATES = [
     {'year': 2024, 'month': 6, 'day': 26, 'hour': 17, 'load_mw': 74521},
@@ -17,12 +19,37 @@ HISTORICAL_4CP_DATES = [
     {'year': 2023, 'month': 9, 'day': 6, 'hour': 16, 'load_mw': 71234},
 ]
 
+FOURCP_MONTHS = [6, 7, 8, 9]
+PEAK_HOURS = [15, 16, 17, 18]
+RISK_LEVELS = np.array(['LOW', 'MODERATE', 'ELEVATED', 'HIGH', 'CRITICAL'])
+RISK_THRESHOLDS = [0.1, 0.3, 0.5, 0.7]
+
+# Step tables shared by the scalar and batch scorers: the factor for a value
+# is the entry after the last threshold it reaches.
+TEMP_THRESHOLDS = [85, 90, 95, 100]
+TEMP_FACTORS = np.array([0.02, 0.08, 0.15, 0.25, 0.35])
+LOAD_RATIO_THRESHOLDS = [0.90, 0.95, 0.98]
+LOAD_FACTORS = np.array([0.02, 0.10, 0.20, 0.30])
+
+ArrayLike = Union[float, int, bool, np.ndarray, pd.Series, list]
+
 
 class PeakPredictor:
-    def __init__(self, load_data: pd.DataFrame, weather_data: Optional[pd.DataFrame] = None):
+    def __init__(
+        self, 
+        load_data: pd.DataFrame, 
+        weather_data: Optional[pd.DataFrame] = None,
+        table: Optional[FourCPTable] = None
+    ):
         self.load_data = load_data
         self.weather_data = weather_data
+        self.table = table
         self.historical_peaks = HISTORICAL_4CP_DATES
+        self.monthly_avg_peak = np.full(13, np.nan)
+        for month in range(1, 13):
+            loads = [p['load_mw'] for p in self.historical_peaks if p['month'] == month]
+            if loads:
+                self.monthly_avg_peak[month] = np.mean(loads)
         
     def calculate_physics_features(self, temp_f: float, wind_mph: float = 5) -> Dict:
         cdd = max(0, temp_f - 65)
@@ -58,7 +85,7 @@ class PeakPredictor:
         month: int,
         is_weekday: bool = True
     ) -> Dict:
-        if month not in [6, 7, 8, 9]:
+        if month not in FOURCP_MONTHS:
             return {
                 'probability': 0.0,
                 'risk_level': 'NONE',
@@ -66,41 +93,23 @@ class PeakPredictor:
                 'factors': {}
             }
         
-        peak_hours = [15, 16, 17, 18]
         physics = self.calculate_physics_features(forecast_temp_f)
         
         base_prob = 0.0
         factors = {}
         
-        if hour in peak_hours:
+        if hour in PEAK_HOURS:
             base_prob += 0.15
             factors['peak_hour'] = '+15%'
         
-        if forecast_temp_f >= 100:
-            temp_factor = 0.35
-        elif forecast_temp_f >= 95:
-            temp_factor = 0.25
-        elif forecast_temp_f >= 90:
-            temp_factor = 0.15
-        elif forecast_temp_f >= 85:
-            temp_factor = 0.08
-        else:
-            temp_factor = 0.02
+        temp_factor = float(TEMP_FACTORS[np.searchsorted(TEMP_THRESHOLDS, forecast_temp_f, side='right')])
         base_prob += temp_factor
         factors['temperature'] = f'+{int(temp_factor*100)}%'
         
-        monthly_peaks = [p for p in self.historical_peaks if p['month'] == month]
-        if monthly_peaks:
-            avg_peak = np.mean([p['load_mw'] for p in monthly_peaks])
+        avg_peak = self.monthly_avg_peak[month]
+        if np.isfinite(avg_peak):
             load_ratio = current_load_mw / avg_peak
-            if load_ratio >= 0.98:
-                load_factor = 0.30
-            elif load_ratio >= 0.95:
-                load_factor = 0.20
-            elif load_ratio >= 0.90:
-                load_factor = 0.10
-            else:
-                load_factor = 0.02
+            load_factor = float(LOAD_FACTORS[np.searchsorted(LOAD_RATIO_THRESHOLDS, load_ratio, side='right')])
             base_prob += load_factor
             factors['load_level'] = f'+{int(load_factor*100)}% (vs avg peak)'
         
@@ -109,20 +118,16 @@ class PeakPredictor:
             factors['weekday'] = '+5%'
         
         base_prob = min(0.95, max(0.0, base_prob))
+        heuristic_prob = base_prob
+        if self.table is not None:
+            base_prob = float(self.table.lookup(current_load_mw, forecast_temp_f, hour, month))
         
-        if base_prob >= 0.7:
-            risk_level = 'CRITICAL'
-        elif base_prob >= 0.5:
-            risk_level = 'HIGH'
-        elif base_prob >= 0.3:
-            risk_level = 'ELEVATED'
-        elif base_prob >= 0.1:
-            risk_level = 'MODERATE'
-        else:
-            risk_level = 'LOW'
+        risk_level = str(RISK_LEVELS[np.searchsorted(RISK_THRESHOLDS, base_prob, side='right')])
         
         return {
             'probability': round(base_prob, 3),
+            'method': 'empirical' if self.table is not None else 'heuristic',
+            'heuristic_probability': round(heuristic_prob, 3),
             'probability_pct': round(base_prob * 100, 1),
             'risk_level': risk_level,
             'physics_features': physics,
@@ -133,6 +138,91 @@ class PeakPredictor:
             'hour': hour
         }
     
+    def calculate_4cp_probability_batch(
+        self,
+        load_mw: ArrayLike,
+        temp_f: ArrayLike,
+        hour: ArrayLike,
+        month: ArrayLike,
+        is_weekday: ArrayLike = True
+    ) -> Dict[str, np.ndarray]:
+        """
+        calculate_4cp_probability over arrays in one pass. Inputs broadcast
+        against each other; factor contributions are fractions and are zero
+        outside June-September, where probability is 0 and risk is 'NONE'.
+        """
+        load_mw, temp_f, hour, month, is_weekday = np.broadcast_arrays(
+            np.asarray(load_mw, dtype=np.float64),
+            np.asarray(temp_f, dtype=np.float64),
+            np.asarray(hour, dtype=np.int64),
+            np.asarray(month, dtype=np.int64),
+            np.asarray(is_weekday, dtype=bool),
+        )
+        in_season = np.isin(month, FOURCP_MONTHS)
+        
+        peak_hour = np.where(np.isin(hour, PEAK_HOURS), 0.15, 0.0)
+        temperature = TEMP_FACTORS[np.searchsorted(TEMP_THRESHOLDS, temp_f, side='right')]
+        
+        avg_peak = self.monthly_avg_peak[np.clip(month, 0, 12)]
+        has_peaks = np.isfinite(avg_peak)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            load_ratio = np.where(has_peaks, load_mw / avg_peak, 0.0)
+        load_level = np.where(
+            has_peaks,
+            LOAD_FACTORS[np.searchsorted(LOAD_RATIO_THRESHOLDS, load_ratio, side='right')],
+            0.0
+        )
+        weekday = np.where(is_weekday, 0.05, 0.0)
+        
+        # Summed in the scalar scorer's order so results match it exactly.
+        probability = np.clip(peak_hour + temperature + load_level + weekday, 0.0, 0.95)
+        probability = np.where(in_season, probability, 0.0)
+        heuristic = probability
+        if self.table is not None:
+            probability = np.where(in_season, self.table.lookup(load_mw, temp_f, hour, month), 0.0)
+        risk_level = np.where(
+            in_season,
+            RISK_LEVELS[np.searchsorted(RISK_THRESHOLDS, probability, side='right')],
+            'NONE'
+        )
+        
+        return {
+            'probability': np.round(probability, 3),
+            'risk_level': risk_level,
+            'in_season': in_season,
+            'method': 'empirical' if self.table is not None else 'heuristic',
+            'heuristic_probability': np.round(heuristic, 3),
+            'load_ratio': np.where(in_season, load_ratio, np.nan),
+            'factors': {
+                'peak_hour': np.where(in_season, peak_hour, 0.0),
+                'temperature': np.where(in_season, temperature, 0.0),
+                'load_level': np.where(in_season, load_level, 0.0),
+                'weekday': np.where(in_season, weekday, 0.0),
+            }
+        }
+    
+    def score_forecast(self, forecast: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score a forecast frame with DATETIME, LOAD_MW and TEMP_F columns (and
+        any others, such as ZONE, which are carried through). Hour, month and
+        weekday come from DATETIME.
+        """
+        times = pd.DatetimeIndex(pd.to_datetime(forecast['DATETIME']))
+        scores = self.calculate_4cp_probability_batch(
+            forecast['LOAD_MW'].values,
+            forecast['TEMP_F'].values,
+            times.hour.values,
+            times.month.values,
+            times.dayofweek.values < 5
+        )
+        result = forecast.copy()
+        result['PROBABILITY'] = scores['probability']
+        result['RISK_LEVEL'] = scores['risk_level']
+        result['LOAD_RATIO'] = scores['load_ratio']
+        for name, contribution in scores['factors'].items():
+            result[f'{name.upper()}_FACTOR'] = contribution
+        return result
+    
     def get_historical_peaks(self, year: Optional[int] = None) -> List[Dict]:
         if year:
             return [p for p in self.historical_peaks if p['year'] == year]
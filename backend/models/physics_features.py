@@ -0,0 +1,210 @@
+"""Columnar physics and lag features for hourly weather, load and price frames."""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+from scipy import signal
+from typing import Dict, Optional
+
+
+WEATHER_COLUMNS = ['TEMP_F', 'DEW_POINT_F', 'WIND_SPEED_MPH', 'HUMIDITY_PCT', 'PRECIP_IN']
+INPUT_COLUMNS = WEATHER_COLUMNS + ['LOAD_MW', 'LMP']
+
+# FEATURE_STORE_HOURLY (ddl/003_ml_tables.sql) without its generated columns.
+FEATURE_STORE_COLUMNS = [
+    'ZONE_CODE', 'DATETIME_UTC',
+    'TEMP_F', 'DEW_POINT_F', 'WIND_SPEED_MPH', 'HUMIDITY_PCT', 'PRECIP_IN',
+    'CDD', 'HDD', 'WIND_CHILL_F', 'HEAT_INDEX_F', 'THERMAL_INERTIA', 'CUMULATIVE_TEMP_7D',
+    'HOUR_OF_DAY', 'DAY_OF_WEEK', 'MONTH', 'IS_WEEKEND', 'IS_HOLIDAY', 'SEASON',
+    'LOAD_LAG_1H', 'LOAD_LAG_24H', 'LOAD_LAG_168H', 'PRICE_LAG_1H', 'PRICE_LAG_24H',
+    'LOAD_ROLLING_24H_AVG', 'LOAD_ROLLING_24H_STD', 'PRICE_ROLLING_24H_AVG',
+    'PRICE_ROLLING_24H_STD', 'TEMP_ROLLING_24H_AVG',
+    'NG_PRICE', 'COAL_PRICE',
+    'ACTUAL_LOAD_MW', 'ACTUAL_LMP',
+]
+
+HISTORY_HOURS = 168
+SEASONS = np.array(['WINTER', 'WINTER', 'SPRING', 'SPRING', 'SPRING', 'SUMMER',
+                    'SUMMER', 'SUMMER', 'FALL', 'FALL', 'FALL', 'WINTER'])
+
+
+def physics_features(temp_f, wind_mph=5.0) -> Dict[str, np.ndarray]:
+    """PeakPredictor.calculate_physics_features over arrays."""
+    temp_f = np.asarray(temp_f, dtype=np.float64)
+    wind_mph = np.broadcast_to(np.asarray(wind_mph, dtype=np.float64), temp_f.shape)
+    cdd = np.maximum(0.0, temp_f - 65)
+    hdd = np.maximum(0.0, 65 - temp_f)
+    with np.errstate(invalid='ignore'):
+        wind_term = wind_mph ** 0.16
+    wind_chill = np.where(
+        (wind_mph > 3) & (temp_f < 50),
+        35.74 + 0.6215 * temp_f - 35.75 * wind_term + 0.4275 * temp_f * wind_term,
+        temp_f
+    )
+    heat_index = np.where(temp_f > 80, temp_f + 0.5 * (temp_f - 80), temp_f)
+    return {
+        'cdd': cdd,
+        'hdd': hdd,
+        'wind_chill': wind_chill,
+        'heat_index': heat_index,
+        'cooling_demand_factor': cdd / 35,
+        'heating_demand_factor': hdd / 35,
+    }
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along the last axis."""
+    idx = np.where(np.isfinite(values), np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return values[np.arange(values.shape[0])[:, None], idx]
+
+
+def _rolling(values: np.ndarray, window: int, start: int):
+    """NaN-aware trailing sum, mean and sample std for positions start.. of each row."""
+    valid = np.isfinite(values)
+    x = np.where(valid, values, 0.0)
+    pad = np.zeros((values.shape[0], 1))
+    c1 = np.concatenate([pad, np.cumsum(x, axis=1)], axis=1)
+    c2 = np.concatenate([pad, np.cumsum(x * x, axis=1)], axis=1)
+    cn = np.concatenate([pad, np.cumsum(valid, axis=1)], axis=1)
+    end = np.arange(start, values.shape[1]) + 1
+    begin = np.maximum(end - window, 0)
+    s1 = c1[:, end] - c1[:, begin]
+    s2 = c2[:, end] - c2[:, begin]
+    n = cn[:, end] - cn[:, begin]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n > 0, s1 / n, np.nan)
+        var = np.where(n > 1, (s2 - s1 * s1 / n) / (n - 1), np.nan)
+    return np.where(n > 0, s1, np.nan), mean, np.sqrt(np.maximum(var, 0.0))
+
+
+class PhysicsFeaturePipeline:
+    """
+    Builds FEATURE_STORE_HOURLY rows for many zones at once. Inputs are
+    pivoted to zones x hours arrays on a regular hourly grid, so every feature
+    is a row-wise numpy operation. The last HISTORY_HOURS hours and the
+    thermal-inertia EWMA state are kept, so ``append`` of new hours gives the
+    same rows a single pass over the full history would.
+    """
+
+    def __init__(self, thermal_span: int = 24):
+        self.thermal_alpha = 2.0 / (thermal_span + 1)
+        self.zones = []
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self._tail = {col: np.empty((0, HISTORY_HOURS)) for col in INPUT_COLUMNS}
+        self._thermal = np.empty(0)
+
+    @staticmethod
+    def to_zone_hours(frame: pd.DataFrame) -> pd.DataFrame:
+        """Average station rows (and sub-hourly readings) to one row per zone and hour."""
+        frame = frame.copy()
+        frame['DATETIME_UTC'] = pd.to_datetime(frame['DATETIME_UTC']).dt.floor('h')
+        for col in INPUT_COLUMNS:
+            frame[col] = pd.to_numeric(frame[col], errors='coerce') if col in frame else np.nan
+        return frame.groupby(['ZONE_CODE', 'DATETIME_UTC'], sort=True)[INPUT_COLUMNS].mean()
+
+    def _add_zones(self, zones):
+        new = [z for z in zones if z not in self.zones]
+        if new:
+            self.zones.extend(new)
+            for col in INPUT_COLUMNS:
+                self._tail[col] = np.vstack([self._tail[col], np.full((len(new), HISTORY_HOURS), np.nan)])
+            self._thermal = np.concatenate([self._thermal, np.full(len(new), np.nan)])
+
+    def append(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feature rows for hours after the last processed hour; earlier rows are
+        ignored (use a fresh pipeline to backfill restated history).
+        """
+        hourly = self.to_zone_hours(frame)
+        if self.last_timestamp is not None:
+            hourly = hourly[hourly.index.get_level_values('DATETIME_UTC') > self.last_timestamp]
+        if hourly.empty:
+            return pd.DataFrame(columns=FEATURE_STORE_COLUMNS)
+
+        self._add_zones(hourly.index.get_level_values('ZONE_CODE').unique())
+        times = hourly.index.get_level_values('DATETIME_UTC')
+        start = self.last_timestamp + pd.Timedelta(hours=1) if self.last_timestamp is not None else times.min()
+        index = pd.date_range(start, times.max(), freq='h')
+        n_zones, n_new, T = len(self.zones), len(index), HISTORY_HOURS
+
+        zone_pos = pd.Index(self.zones).get_indexer(hourly.index.get_level_values('ZONE_CODE'))
+        hour_pos = index.get_indexer(times)
+        combined = {}
+        for col in INPUT_COLUMNS:
+            grid = np.full((n_zones, n_new), np.nan)
+            grid[zone_pos, hour_pos] = hourly[col].values
+            combined[col] = np.concatenate([self._tail[col], grid], axis=1)
+        observed = np.zeros((n_zones, n_new), dtype=bool)
+        observed[zone_pos, hour_pos] = True
+
+        temp = combined['TEMP_F'][:, T:]
+        physics = physics_features(temp, np.nan_to_num(combined['WIND_SPEED_MPH'][:, T:], nan=5.0))
+
+        # Thermal inertia: EWMA (adjust=False) of forward-filled temperature,
+        # continued from the previous call's last value.
+        a = self.thermal_alpha
+        temp_ff = _ffill(combined['TEMP_F'])[:, T:]
+        first_valid = np.where(np.isfinite(temp_ff).any(axis=1),
+                               temp_ff[np.arange(n_zones), np.argmax(np.isfinite(temp_ff), axis=1)], np.nan)
+        seed = np.where(np.isfinite(self._thermal), self._thermal, first_valid)
+        x = np.where(np.isfinite(temp_ff), temp_ff, seed[:, None])
+        thermal = signal.lfilter([a], [1.0, -(1 - a)], np.nan_to_num(x), axis=1,
+                                 zi=((1 - a) * np.nan_to_num(seed))[:, None])[0]
+        thermal = np.where(np.isfinite(x) & np.isfinite(seed)[:, None], thermal, np.nan)
+        pending = ~np.isfinite(self._thermal) & np.isfinite(first_valid)
+        leading = pending[:, None] & (np.cumsum(np.isfinite(temp_ff), axis=1) == 0)
+        thermal[leading] = np.nan
+
+        degree_days = (np.maximum(0.0, combined['TEMP_F'] - 65) + np.maximum(0.0, 65 - combined['TEMP_F'])) / 24
+        cumulative_7d, _, _ = _rolling(degree_days, HISTORY_HOURS, T)
+        _, load_avg, load_std = _rolling(combined['LOAD_MW'], 24, T)
+        _, price_avg, price_std = _rolling(combined['LMP'], 24, T)
+        _, temp_avg, _ = _rolling(combined['TEMP_F'], 24, T)
+
+        def lag(col, hours):
+            return combined[col][:, T - hours:T - hours + n_new]
+
+        holidays = USFederalHolidayCalendar().holidays(index.min().normalize(), index.max())
+        hour_of_day = index.hour.values
+        day_of_week = index.dayofweek.values
+        month = index.month.values
+
+        columns = {
+            'ZONE_CODE': np.repeat(np.array(self.zones, dtype=object), n_new),
+            'DATETIME_UTC': np.tile(index.values, n_zones),
+            'TEMP_F': temp, 'DEW_POINT_F': combined['DEW_POINT_F'][:, T:],
+            'WIND_SPEED_MPH': combined['WIND_SPEED_MPH'][:, T:],
+            'HUMIDITY_PCT': combined['HUMIDITY_PCT'][:, T:], 'PRECIP_IN': combined['PRECIP_IN'][:, T:],
+            'CDD': physics['cdd'], 'HDD': physics['hdd'],
+            'WIND_CHILL_F': physics['wind_chill'], 'HEAT_INDEX_F': physics['heat_index'],
+            'THERMAL_INERTIA': thermal, 'CUMULATIVE_TEMP_7D': cumulative_7d,
+            'HOUR_OF_DAY': np.tile(hour_of_day, n_zones), 'DAY_OF_WEEK': np.tile(day_of_week, n_zones),
+            'MONTH': np.tile(month, n_zones), 'IS_WEEKEND': np.tile(day_of_week >= 5, n_zones),
+            'IS_HOLIDAY': np.tile(index.normalize().isin(holidays), n_zones),
+            'SEASON': np.tile(SEASONS[month - 1], n_zones),
+            'LOAD_LAG_1H': lag('LOAD_MW', 1), 'LOAD_LAG_24H': lag('LOAD_MW', 24),
+            'LOAD_LAG_168H': lag('LOAD_MW', 168),
+            'PRICE_LAG_1H': lag('LMP', 1), 'PRICE_LAG_24H': lag('LMP', 24),
+            'LOAD_ROLLING_24H_AVG': load_avg, 'LOAD_ROLLING_24H_STD': load_std,
+            'PRICE_ROLLING_24H_AVG': price_avg, 'PRICE_ROLLING_24H_STD': price_std,
+            'TEMP_ROLLING_24H_AVG': temp_avg,
+            'NG_PRICE': np.nan, 'COAL_PRICE': np.nan,
+            'ACTUAL_LOAD_MW': combined['LOAD_MW'][:, T:], 'ACTUAL_LMP': combined['LMP'][:, T:],
+        }
+        features = pd.DataFrame({
+            name: (np.ravel(value) if np.ndim(value) == 2 else value)
+            for name, value in columns.items()
+        }, columns=FEATURE_STORE_COLUMNS)
+
+        for col in INPUT_COLUMNS:
+            self._tail[col] = combined[col][:, -T:]
+        last_thermal = thermal[:, -1]
+        self._thermal = np.where(np.isfinite(last_thermal), last_thermal, self._thermal)
+        self.last_timestamp = index[-1]
+
+        return features[observed.ravel()].reset_index(drop=True)
+
+    def transform(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Features for a whole frame from an empty history, for bulk backfill."""
+        return PhysicsFeaturePipeline(int(round(2 / self.thermal_alpha - 1))).append(frame)
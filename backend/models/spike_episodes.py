@@ -0,0 +1,154 @@
+"""Group contiguous price-spike hours into events with run-length encoding."""
+
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+
+EPISODE_INDEX_TTL_SECONDS = 900
+
+
+def detect_episodes(spikes: pd.DataFrame) -> pd.DataFrame:
+    """
+    ``spikes`` holds only the hours at or above the threshold (DATETIME,
+    RT_PRICE, DA_PRICE, LOAD_MW), sorted by DATETIME. Hours no more than one
+    hour apart belong to the same episode.
+    """
+    columns = ['start', 'end', 'duration_hours', 'peak_price', 'avg_price',
+               'energy_weighted_price', 'avg_da_rt_spread', 'total_load_mwh']
+    if spikes.empty:
+        return pd.DataFrame(columns=columns)
+
+    hours = spikes['DATETIME'].values.astype('datetime64[h]').astype(np.int64)
+    new_run = np.concatenate(([True], np.diff(hours) > 1))
+    starts = np.flatnonzero(new_run)
+    ends = np.concatenate((starts[1:], [len(hours)])) - 1
+
+    rt = spikes['RT_PRICE'].values.astype(np.float64)
+    da = spikes['DA_PRICE'].values.astype(np.float64)
+    load = spikes['LOAD_MW'].values.astype(np.float64)
+
+    counts = np.diff(np.concatenate((starts, [len(hours)])))
+    rt_sum = np.add.reduceat(rt, starts)
+
+    weights = np.where(np.isfinite(load) & (load > 0), load, 0.0)
+    weight_sum = np.add.reduceat(weights, starts)
+    weighted_sum = np.add.reduceat(weights * rt, starts)
+
+    spread = rt - da
+    spread_valid = np.isfinite(spread)
+    spread_sum = np.add.reduceat(np.where(spread_valid, spread, 0.0), starts)
+    spread_count = np.add.reduceat(spread_valid.astype(np.int64), starts)
+
+    avg_price = rt_sum / counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        energy_weighted = np.where(weight_sum > 0, weighted_sum / weight_sum, avg_price)
+        avg_spread = np.where(spread_count > 0, spread_sum / spread_count, np.nan)
+
+    datetimes = spikes['DATETIME'].values
+    return pd.DataFrame({
+        'start': datetimes[starts],
+        'end': datetimes[ends],
+        'duration_hours': counts,
+        'peak_price': np.maximum.reduceat(rt, starts),
+        'avg_price': avg_price,
+        'energy_weighted_price': energy_weighted,
+        'avg_da_rt_spread': avg_spread,
+        'total_load_mwh': weight_sum,
+    }, columns=columns)
+
+
+class SpikeEpisodeIndex:
+    def __init__(self, zone: str, threshold: float):
+        self.zone = zone
+        self.threshold = threshold
+        self.spikes = pd.DataFrame(columns=['DATETIME', 'RT_PRICE', 'DA_PRICE', 'LOAD_MW'])
+        self.episodes = detect_episodes(self.spikes)
+        self.refreshed_at: Optional[float] = None
+
+    @property
+    def last_datetime(self):
+        return self.spikes['DATETIME'].iloc[-1] if len(self.spikes) else None
+
+    def is_stale(self, max_age: float = EPISODE_INDEX_TTL_SECONDS) -> bool:
+        return self.refreshed_at is None or time.time() - self.refreshed_at >= max_age
+
+    def append(self, new_spikes: pd.DataFrame):
+        if not new_spikes.empty:
+            new_spikes = new_spikes.copy()
+            new_spikes['DATETIME'] = pd.to_datetime(new_spikes['DATETIME'])
+            for col in ['RT_PRICE', 'DA_PRICE', 'LOAD_MW']:
+                new_spikes[col] = pd.to_numeric(new_spikes[col], errors='coerce')
+            if len(self.spikes):
+                self.spikes = pd.concat([self.spikes, new_spikes], ignore_index=True)
+            else:
+                self.spikes = new_spikes.reset_index(drop=True)
+            self.spikes = self.spikes.sort_values('DATETIME', kind='stable').reset_index(drop=True)
+            # Re-encoding is over the cached spike hours only, so an episode
+            # that straddles two refreshes is merged without a warehouse rescan.
+            self.episodes = detect_episodes(self.spikes)
+        self.refreshed_at = time.time()
+
+    def summary(self) -> Dict:
+        rt = self.spikes['RT_PRICE'].values.astype(np.float64) if len(self.spikes) else np.empty(0)
+        return {
+            'event_count': int(len(rt)),
+            'avg_spike_price': float(rt.mean()) if len(rt) else 0,
+            'max_spike_price': float(rt.max()) if len(rt) else 0,
+            'episode_count': int(len(self.episodes)),
+            'longest_episode_hours': int(self.episodes['duration_hours'].max()) if len(self.episodes) else 0,
+        }
+
+    def hourly_events(self, limit: int = 100) -> list:
+        head = self.spikes.iloc[:limit]
+        rt = head['RT_PRICE'].values.astype(np.float64)
+        da = head['DA_PRICE'].values.astype(np.float64)
+        spread = np.where(np.isfinite(rt) & np.isfinite(da), rt - da, 0.0)
+        rt = np.nan_to_num(rt)
+        da = np.nan_to_num(da)
+        return [
+            {'datetime': str(ts), 'rt_price': float(r), 'da_price': float(d), 'spread': float(s)}
+            for ts, r, d, s in zip(head['DATETIME'], rt, da, spread)
+        ]
+
+    def page(self, page: int = 1, page_size: int = 50, newest_first: bool = True) -> Dict:
+        episodes = self.episodes.iloc[::-1] if newest_first else self.episodes
+        offset = max(page - 1, 0) * page_size
+        window = episodes.iloc[offset:offset + page_size]
+        records = []
+        for row in window.itertuples(index=False):
+            records.append({
+                'start': str(pd.Timestamp(row.start)),
+                'end': str(pd.Timestamp(row.end)),
+                'duration_hours': int(row.duration_hours),
+                'peak_price': float(row.peak_price),
+                'avg_price': float(row.avg_price),
+                'energy_weighted_price': float(row.energy_weighted_price),
+                'avg_da_rt_spread': float(row.avg_da_rt_spread) if np.isfinite(row.avg_da_rt_spread) else None,
+            })
+        return {
+            'page': page,
+            'page_size': page_size,
+            'total_episodes': int(len(self.episodes)),
+            'total_pages': int(-(-len(self.episodes) // page_size)) if page_size else 0,
+            'episodes': records,
+        }
+
+
+# Keyed by the caller's threshold, so least recently used indexes are
+# dropped beyond MAX_EPISODE_INDEXES.
+MAX_EPISODE_INDEXES = 32
+_episode_indexes: 'OrderedDict[Tuple[str, float], SpikeEpisodeIndex]' = OrderedDict()
+
+
+def get_episode_index(zone: str, threshold: float) -> SpikeEpisodeIndex:
+    key = (zone, float(threshold))
+    if key in _episode_indexes:
+        _episode_indexes.move_to_end(key)
+    else:
+        _episode_indexes[key] = SpikeEpisodeIndex(zone, float(threshold))
+        while len(_episode_indexes) > MAX_EPISODE_INDEXES:
+            _episode_indexes.popitem(last=False)
+    return _episode_indexes[key]
@@ -0,0 +1,126 @@
+"""Streaming historical VaR/ES over a sliding window of returns."""
+
+from collections import OrderedDict, deque
+from itertools import islice
+import numpy as np
+import pandas as pd
+from sortedcontainers import SortedList
+from typing import Iterable, Optional, Tuple
+
+
+class StreamingVaRTracker:
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self._window = deque()
+        self._sorted = SortedList()
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    @property
+    def last_timestamp(self):
+        return self._window[-1][0] if self._window else None
+
+    @property
+    def first_timestamp(self):
+        return self._window[0][0] if self._window else None
+
+    def append(self, value: float, timestamp=None):
+        if not np.isfinite(value):
+            return
+        self._window.append((timestamp, value))
+        self._sorted.add(value)
+        if self.max_size is not None and len(self._window) > self.max_size:
+            self.pop_oldest()
+
+    def extend(self, values: Iterable[float], timestamps: Optional[Iterable] = None):
+        if timestamps is None:
+            for value in values:
+                self.append(value)
+        else:
+            for timestamp, value in zip(timestamps, values):
+                self.append(value, timestamp)
+
+    def pop_oldest(self) -> float:
+        _, value = self._window.popleft()
+        self._sorted.remove(value)
+        return value
+
+    def evict_before(self, timestamp):
+        while self._window and self._window[0][0] < timestamp:
+            self.pop_oldest()
+
+    def clear(self):
+        self._window.clear()
+        self._sorted.clear()
+
+    def sync(self, returns: pd.Series):
+        """Bring the window in line with ``returns``, touching only new and expired ticks."""
+        returns = returns[np.isfinite(returns.values)]
+        if returns.empty:
+            self.clear()
+            return
+        if self._window and self.first_timestamp <= returns.index[0] and \
+                self.last_timestamp <= returns.index[-1] and self._tail_matches(returns):
+            self.evict_before(returns.index[0])
+            new = returns[returns.index > self.last_timestamp]
+            self.extend(new.values, new.index)
+            if len(self) == len(returns) and self.last_timestamp == returns.index[-1]:
+                return
+        self.clear()
+        self.extend(returns.values, returns.index)
+
+    def _tail_matches(self, returns: pd.Series) -> bool:
+        """The window's newest tick is still in ``returns`` with the same value (not restated)."""
+        timestamp, value = self._window[-1]
+        pos = returns.index.searchsorted(timestamp)
+        return pos < len(returns) and returns.index[pos] == timestamp and returns.iloc[pos] == value
+
+    def quantile(self, q: float) -> float:
+        n = len(self._sorted)
+        if n == 0:
+            return float('nan')
+        pos = (n - 1) * q
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        lower = self._sorted[lo]
+        return lower + (pos - lo) * (self._sorted[hi] - lower)
+
+    def tail_mean(self, threshold: float) -> float:
+        count = self._sorted.bisect_right(threshold)
+        if count == 0:
+            return float('nan')
+        return sum(islice(self._sorted, 0, count)) / count
+
+    def historical_var(
+        self,
+        confidence: float = 0.95,
+        position_value: float = 1000000
+    ) -> Tuple[float, float]:
+        var_pct = self.quantile(1 - confidence)
+        return -var_pct * position_value, -var_pct
+
+    def expected_shortfall(
+        self,
+        confidence: float = 0.95,
+        position_value: float = 1000000
+    ) -> Tuple[float, float]:
+        es_pct = self.tail_mean(self.quantile(1 - confidence))
+        return -es_pct * position_value, -es_pct
+
+
+# Long-lived trackers shared by the risk routes, keyed by zone and lookback.
+# Least recently used trackers are dropped beyond MAX_TRACKERS, since each
+# holds days x 24 returns.
+MAX_TRACKERS = 16
+_trackers: 'OrderedDict[str, StreamingVaRTracker]' = OrderedDict()
+
+
+def get_var_tracker(key: str, max_size: Optional[int] = None) -> StreamingVaRTracker:
+    if key in _trackers:
+        _trackers.move_to_end(key)
+    else:
+        _trackers[key] = StreamingVaRTracker(max_size)
+        while len(_trackers) > MAX_TRACKERS:
+            _trackers.popitem(last=False)
+    return _trackers[key]
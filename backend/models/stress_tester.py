@@ -1,10 +1,14 @@
 """Stress testing scenarios from 03_risk_modeling notebook."""
 
+import time
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, Sequence
 
 
+WINDOW_LIBRARY_TTL_SECONDS = 900
+
 PREDEFINED_SCENARIOS = {
     'winter_storm_uri': {
         'name': 'Winter Storm Uri (Feb 2021)',
@@ -39,11 +43,66 @@ PREDEFINED_SCENARIOS = {
 }
 
 
+def scenario_duration(scenario: Dict) -> int:
+    return scenario.get('duration_hours', scenario.get('duration', 1))
+
+
+def scenario_shape(scenario: Dict) -> np.ndarray:
+    if 'price_shape' in scenario:
+        return np.asarray(scenario['price_shape'], dtype=np.float64)
+    return np.full(int(scenario_duration(scenario)), float(scenario['price_level']))
+
+
+def run_scenario_grid(
+    scenarios: Dict[str, Dict],
+    capacities: Sequence[float],
+    base_prices: Dict[str, float]
+) -> Dict:
+    """Impact of every scenario x capacity x zone as one broadcast computation."""
+    keys = list(scenarios)
+    zones = list(base_prices)
+    stress = np.array([scenarios[k]['price_level'] for k in keys], dtype=np.float64)
+    duration = np.array([scenario_duration(scenarios[k]) for k in keys], dtype=np.float64)
+    capacity = np.asarray(capacities, dtype=np.float64)
+    base = np.array([base_prices[z] for z in zones], dtype=np.float64)
+
+    savings_per_mwh = stress[:, None] - base[None, :]
+    total_mwh = duration[:, None] * capacity[None, :]
+    total_savings = savings_per_mwh[:, None, :] * total_mwh[:, :, None]
+
+    return {
+        'scenarios': [
+            {
+                'key': key,
+                'name': scenarios[key]['name'],
+                'price_level': float(stress[i]),
+                'duration_hours': float(duration[i]),
+                'type': scenarios[key].get('type', 'custom')
+            }
+            for i, key in enumerate(keys)
+        ],
+        'capacities_mw': capacity.tolist(),
+        'zones': zones,
+        'base_prices': dict(zip(zones, base.tolist())),
+        'savings_per_mwh': savings_per_mwh.tolist(),
+        'total_mwh': total_mwh.tolist(),
+        'total_savings': total_savings.tolist(),
+        'total_potential_savings': total_savings.sum(axis=0).tolist()
+    }
+
+
 class StressTester:
-    def __init__(self, prices: pd.Series, returns: Optional[pd.Series] = None):
+    def __init__(
+        self, 
+        prices: Optional[pd.Series] = None, 
+        returns: Optional[pd.Series] = None,
+        base_price: Optional[float] = None
+    ):
+        if prices is None:
+            prices = pd.Series(dtype=float)
         self.prices = prices
         self.returns = returns if returns is not None else prices.pct_change().dropna()
-        self.base_price = float(prices.mean())
+        self.base_price = float(base_price) if base_price is not None else float(prices.mean())
         self.scenarios = {}
         
         for key, scenario in PREDEFINED_SCENARIOS.items():
@@ -65,6 +124,68 @@ class StressTester:
             'description': description or f'Price spike to ${price_level}/MWh for {duration_hours} hours'
         }
     
+    def add_shaped_scenario(
+        self, 
+        name: str, 
+        hourly_prices: Sequence[float],
+        description: str = '',
+        source: Optional[Dict] = None
+    ):
+        # price_level is the shape's mean, so flat-capacity results from
+        # calculate_scenario_impact and run_scenario_grid stay exact.
+        shape = np.asarray(hourly_prices, dtype=np.float64)
+        self.scenarios[name] = {
+            'name': name,
+            'type': 'shaped',
+            'price_level': float(shape.mean()) if len(shape) else 0.0,
+            'peak_price': float(shape.max()) if len(shape) else 0.0,
+            'duration_hours': len(shape),
+            'price_shape': shape,
+            'source': source or {'kind': 'custom'},
+            'description': description or f'Hourly price shape over {len(shape)} hours, peak ${shape.max() if len(shape) else 0:,.0f}/MWh'
+        }
+    
+    def shaped_impacts(
+        self, 
+        profile_mw, 
+        scenario_keys: Optional[Sequence[str]] = None
+    ) -> Dict:
+        """
+        Evaluate scenarios hour by hour against a curtailment/load profile.
+        ``profile_mw`` is a scalar capacity or an hourly MW vector starting at
+        each scenario's first hour; hours beyond it are not curtailed.
+        """
+        keys = list(scenario_keys) if scenario_keys is not None else list(self.scenarios)
+        shapes = [scenario_shape(self.scenarios[k]) for k in keys]
+        horizon = max((len(sh) for sh in shapes), default=0)
+        
+        excess = np.zeros((len(keys), horizon))
+        for i, sh in enumerate(shapes):
+            excess[i, :len(sh)] = sh - self.base_price
+        # Hours without a price contribute nothing rather than NaN totals.
+        excess[~np.isfinite(excess)] = 0.0
+        
+        profile = np.asarray(profile_mw, dtype=np.float64)
+        if profile.ndim == 0:
+            profile_h = np.full(horizon, float(profile))
+        else:
+            profile_h = np.zeros(horizon)
+            n = min(horizon, len(profile))
+            profile_h[:n] = profile[:n]
+        lengths = np.array([len(sh) for sh in shapes])
+        active = np.arange(horizon)[None, :] < lengths[:, None]
+        
+        hourly_savings = excess * profile_h[None, :]
+        return {
+            'scenario_keys': keys,
+            'base_price': self.base_price,
+            'hours': horizon,
+            'total_savings': hourly_savings.sum(axis=1),
+            'total_mwh': (active * profile_h[None, :]).sum(axis=1),
+            'peak_hour_savings': hourly_savings.max(axis=1) if horizon else np.zeros(len(keys)),
+            'hourly_savings': hourly_savings,
+        }
+    
     def calculate_scenario_impact(
         self, 
         scenario_key: str, 
@@ -76,7 +197,7 @@ class StressTester:
         
         scenario = self.scenarios[scenario_key]
         stress_price = scenario['price_level']
-        duration = scenario.get('duration_hours', scenario.get('duration', 1))
+        duration = scenario_duration(scenario)
         
         if is_generator:
             revenue_per_mwh = stress_price - self.base_price
@@ -121,3 +242,78 @@ class StressTester:
             }
             for key, s in self.scenarios.items()
         ]
+
+
+class HistoricalWindowLibrary:
+    """
+    Hourly prices for one zone on a regular hourly grid, indexed so that any
+    replay window is a slice and the most extreme windows of a given length
+    come from one cumulative sum.
+    """
+    
+    def __init__(self, prices: pd.Series):
+        prices = prices.sort_index()
+        prices = prices[~prices.index.duplicated(keep='last')]
+        if len(prices):
+            grid = pd.date_range(prices.index[0].floor('h'), prices.index[-1].floor('h'), freq='h')
+            # bfill covers a first grid hour with no price within tolerance.
+            prices = prices.reindex(grid, method='nearest', tolerance=pd.Timedelta('30min')).ffill().bfill()
+        self.index = prices.index
+        self.values = prices.values.astype(np.float64)
+        self._cumsum = np.concatenate(([0.0], np.cumsum(np.nan_to_num(self.values))))
+        self._top_windows: Dict[Tuple[int, int], list] = {}
+        self.built_at = time.time()
+    
+    def is_stale(self, max_age: float = WINDOW_LIBRARY_TTL_SECONDS) -> bool:
+        return time.time() - self.built_at >= max_age
+    
+    def window(self, start, hours: int) -> np.ndarray:
+        pos = self.index.searchsorted(pd.Timestamp(start))
+        return self.values[pos:pos + hours]
+    
+    def rolling_means(self, hours: int) -> np.ndarray:
+        if hours <= 0 or hours > len(self.values):
+            return np.empty(0)
+        return (self._cumsum[hours:] - self._cumsum[:-hours]) / hours
+    
+    def top_windows(self, hours: int, k: int = 10) -> list:
+        key = (hours, k)
+        if key not in self._top_windows:
+            means = self.rolling_means(hours)
+            picked = []
+            # Greedy non-overlapping selection from the highest-average windows.
+            for pos in np.argsort(means)[::-1]:
+                if len(picked) == k:
+                    break
+                if all(abs(pos - p) >= hours for p in picked):
+                    picked.append(int(pos))
+            self._top_windows[key] = [
+                {
+                    'start': str(self.index[p]),
+                    'end': str(self.index[p + hours - 1]),
+                    'hours': hours,
+                    'avg_price': float(means[p]),
+                    'peak_price': float(np.nanmax(self.values[p:p + hours]))
+                }
+                for p in picked
+            ]
+        return self._top_windows[key]
+
+
+# Keyed by the caller's lookback, so least recently used libraries are
+# dropped beyond MAX_WINDOW_LIBRARIES.
+MAX_WINDOW_LIBRARIES = 16
+_window_libraries: 'OrderedDict[Tuple[str, int], HistoricalWindowLibrary]' = OrderedDict()
+
+
+def get_window_library(zone: str, days: int, fetch_prices) -> HistoricalWindowLibrary:
+    """``fetch_prices()`` is only called when the zone's library is missing or stale."""
+    key = (zone, int(days))
+    library = _window_libraries.get(key)
+    if library is None or library.is_stale():
+        library = HistoricalWindowLibrary(fetch_prices())
+        _window_libraries[key] = library
+        while len(_window_libraries) > MAX_WINDOW_LIBRARIES:
+            _window_libraries.popitem(last=False)
+    _window_libraries.move_to_end(key)
+    return library
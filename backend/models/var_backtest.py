@@ -0,0 +1,173 @@
+"""Rolling VaR backtesting with Kupiec and Christoffersen exceedance tests."""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import stats
+from scipy.special import xlogy
+from typing import Dict
+
+from .var_calculator import cornish_fisher_z
+
+
+VAR_METHODS = ['parametric_var', 'historical_var', 'cornish_fisher_var']
+
+# Number of windows materialised per block; bounds memory for long histories.
+WINDOW_CHUNK = 4096
+
+
+def kupiec_test(hits: np.ndarray, confidence: float) -> Dict:
+    n = len(hits)
+    x = int(hits.sum())
+    p = 1 - confidence
+    if n == 0:
+        return {'lr_pof': None, 'p_value': None}
+    rate = x / n
+    lr = -2 * (xlogy(n - x, 1 - p) + xlogy(x, p) - xlogy(n - x, 1 - rate) - xlogy(x, rate))
+    return {'lr_pof': float(lr), 'p_value': float(stats.chi2.sf(lr, 1))}
+
+
+def christoffersen_test(hits: np.ndarray) -> Dict:
+    if len(hits) < 2:
+        return {'lr_ind': None, 'p_value': None}
+    prev = hits[:-1].astype(bool)
+    curr = hits[1:].astype(bool)
+    n00 = int(np.sum(~prev & ~curr))
+    n01 = int(np.sum(~prev & curr))
+    n10 = int(np.sum(prev & ~curr))
+    n11 = int(np.sum(prev & curr))
+    pi01 = n01 / (n00 + n01) if n00 + n01 else 0.0
+    pi11 = n11 / (n10 + n11) if n10 + n11 else 0.0
+    pi = (n01 + n11) / (n00 + n01 + n10 + n11)
+    lr = -2 * (
+        xlogy(n00 + n10, 1 - pi) + xlogy(n01 + n11, pi)
+        - xlogy(n00, 1 - pi01) - xlogy(n01, pi01)
+        - xlogy(n10, 1 - pi11) - xlogy(n11, pi11)
+    )
+    return {'lr_ind': float(lr), 'p_value': float(stats.chi2.sf(lr, 1))}
+
+
+class VaRBacktester:
+    def __init__(self, returns: pd.Series, window: int = 720):
+        self.returns = returns.dropna()
+        self.window = window
+        self._forecasts: Dict[float, pd.DataFrame] = {}
+
+    def rolling_forecasts(self, confidence: float = 0.95) -> pd.DataFrame:
+        if confidence in self._forecasts:
+            return self._forecasts[confidence]
+
+        values = self.returns.values.astype(np.float64)
+        w = self.window
+        n_forecasts = len(values) - w
+        if n_forecasts <= 0:
+            return pd.DataFrame(columns=['realized'] + VAR_METHODS + ['expected_shortfall'])
+
+        # Window i covers returns[i:i+w] and forecasts the return at i+w.
+        windows = sliding_window_view(values[:-1], w)
+        q = 1 - confidence
+        pos = (w - 1) * q
+        lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+        frac = pos - lo
+        z = stats.norm.ppf(q)
+
+        mean = np.empty(n_forecasts)
+        std = np.empty(n_forecasts)
+        skew = np.empty(n_forecasts)
+        kurt = np.empty(n_forecasts)
+        quantile = np.empty(n_forecasts)
+        es = np.empty(n_forecasts)
+
+        for start in range(0, n_forecasts, WINDOW_CHUNK):
+            block = windows[start:start + WINDOW_CHUNK]
+            sl = slice(start, start + len(block))
+
+            mu = block.mean(axis=1)
+            centered = block - mu[:, None]
+            sq = centered * centered
+            m2 = sq.mean(axis=1)
+            m3 = (sq * centered).mean(axis=1)
+            m4 = (sq * sq).mean(axis=1)
+            mean[sl] = mu
+            std[sl] = np.sqrt(m2 * w / (w - 1))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                skew[sl] = m3 / m2 ** 1.5
+                kurt[sl] = m4 / m2 ** 2 - 3
+
+            part = np.partition(block, [lo, hi], axis=1)
+            threshold = part[:, lo] + frac * (part[:, hi] - part[:, lo])
+            quantile[sl] = threshold
+
+            tail = block <= threshold[:, None]
+            es[sl] = np.where(tail, block, 0.0).sum(axis=1) / tail.sum(axis=1)
+
+        forecasts = pd.DataFrame({
+            'realized': values[w:],
+            'parametric_var': -(mean + z * std),
+            'historical_var': -quantile,
+            'cornish_fisher_var': -(mean + cornish_fisher_z(z, skew, kurt) * std),
+            'expected_shortfall': -es,
+        }, index=self.returns.index[w:])
+        self._forecasts[confidence] = forecasts
+        return forecasts
+
+    def evaluate(self, confidence: float = 0.95) -> Dict:
+        forecasts = self.rolling_forecasts(confidence)
+        realized = forecasts['realized'].values
+        n = len(realized)
+        expected_rate = 1 - confidence
+
+        methods = {}
+        for method in VAR_METHODS:
+            var_pct = forecasts[method].values
+            valid = np.isfinite(var_pct)
+            hits = (realized[valid] < -var_pct[valid]).astype(np.int8)
+            kupiec = kupiec_test(hits, confidence)
+            independence = christoffersen_test(hits)
+            if kupiec['lr_pof'] is not None and independence['lr_ind'] is not None:
+                lr_cc = kupiec['lr_pof'] + independence['lr_ind']
+                conditional = {'lr_cc': lr_cc, 'p_value': float(stats.chi2.sf(lr_cc, 2))}
+            else:
+                conditional = {'lr_cc': None, 'p_value': None}
+            methods[method] = {
+                'observations': int(valid.sum()),
+                'exceedances': int(hits.sum()),
+                'exceedance_rate': float(hits.mean()) if len(hits) else None,
+                'expected_rate': expected_rate,
+                'kupiec': kupiec,
+                'christoffersen': independence,
+                'conditional_coverage': conditional,
+            }
+
+        # ES has no binary exceedance test; compare realized losses on VaR
+        # breaches with the ES forecast for those hours (1.0 = well calibrated).
+        es_pct = forecasts['expected_shortfall'].values
+        breaches = realized < -forecasts['historical_var'].values
+        if breaches.any():
+            tail_ratio = float(np.mean(-realized[breaches]) / np.mean(es_pct[breaches]))
+        else:
+            tail_ratio = None
+        methods['expected_shortfall'] = {
+            'observations': n,
+            'breaches': int(breaches.sum()),
+            'mean_forecast_es': float(np.mean(es_pct[breaches])) if breaches.any() else None,
+            'mean_realized_tail_loss': float(np.mean(-realized[breaches])) if breaches.any() else None,
+            'tail_loss_ratio': tail_ratio,
+        }
+
+        return {
+            'confidence_level': confidence,
+            'window': self.window,
+            'forecasts': n,
+            'methods': methods,
+        }
+
+    def recent_series(self, confidence: float = 0.95, n_points: int = 168) -> list:
+        forecasts = self.rolling_forecasts(confidence).iloc[-n_points:]
+        return [
+            {
+                'datetime': str(idx),
+                **{col: (float(val) if np.isfinite(val) else None) for col, val in row.items()}
+            }
+            for idx, row in forecasts.iterrows()
+        ]
@@ -1,14 +1,75 @@
 """Value at Risk calculations from 03_risk_modeling notebook."""
 
+import hashlib
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 from scipy import stats
-from typing import Tuple
+from typing import Dict, Optional, Sequence, Tuple
+
+from .streaming_var import StreamingVaRTracker
+
+
+T_FIT_CACHE_SIZE = 64
+
+# Fitted Student-t (df, loc, scale) keyed by a digest of the returns data,
+# plus the latest fit per cache key used to warm-start the next refit.
+_t_fit_cache: 'OrderedDict[str, Tuple[float, float, float]]' = OrderedDict()
+_t_fit_latest: Dict[str, Tuple[float, float, float]] = {}
+
+
+def returns_digest(returns: np.ndarray) -> str:
+    data = np.ascontiguousarray(returns, dtype=np.float64)
+    return hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
+
+
+def fit_student_t(
+    returns: np.ndarray,
+    cache_key: Optional[str] = None
+) -> Tuple[float, float, float]:
+    digest = returns_digest(returns)
+    params = _t_fit_cache.get(digest)
+    if params is not None:
+        _t_fit_cache.move_to_end(digest)
+        return params
+
+    previous = _t_fit_latest.get(cache_key) if cache_key else None
+    if previous is not None:
+        df0, loc0, scale0 = previous
+        params = stats.t.fit(returns, df0, loc=loc0, scale=scale0)
+    else:
+        params = stats.t.fit(returns)
+    params = tuple(float(p) for p in params)
+
+    _t_fit_cache[digest] = params
+    if len(_t_fit_cache) > T_FIT_CACHE_SIZE:
+        _t_fit_cache.popitem(last=False)
+    if cache_key:
+        _t_fit_latest[cache_key] = params
+    return params
+
+
+def clear_t_fit_cache():
+    _t_fit_cache.clear()
+    _t_fit_latest.clear()
+
+
+def cornish_fisher_z(z, S, K):
+    return (z + (z**2 - 1) * S / 6 + 
+            (z**3 - 3*z) * (K - 3) / 24 - 
+            (2*z**3 - 5*z) * S**2 / 36)
 
 
 class VaRCalculator:
-    def __init__(self, returns: pd.Series):
+    def __init__(
+        self,
+        returns: pd.Series,
+        cache_key: Optional[str] = None,
+        tracker: Optional[StreamingVaRTracker] = None
+    ):
         self.returns = returns.dropna()
+        self.cache_key = cache_key
+        self.tracker = tracker
         
     def parametric_var(
         self, 
@@ -26,20 +87,36 @@ class VaRCalculator:
         confidence: float = 0.95, 
         position_value: float = 1000000
     ) -> Tuple[float, float]:
+        if self.tracker is not None:
+            return self.tracker.historical_var(confidence, position_value)
         var_pct = self.returns.quantile(1 - confidence)
         return -var_pct * position_value, -var_pct
     
+    def t_params(self) -> Tuple[float, float, float]:
+        return fit_student_t(self.returns.values, self.cache_key)
+    
     def monte_carlo_var(
         self, 
         confidence: float = 0.95, 
         position_value: float = 1000000,
-        n_sims: int = 10000
+        n_sims: int = 10000,
+        seed: Optional[int] = None
     ) -> Tuple[float, float]:
-        params = stats.t.fit(self.returns)
-        simulated = stats.t.rvs(*params, size=n_sims)
+        params = self.t_params()
+        rng = np.random.default_rng(seed)
+        simulated = stats.t.rvs(*params, size=n_sims, random_state=rng)
         var_pct = np.percentile(simulated, (1 - confidence) * 100)
         return -var_pct * position_value, -var_pct
     
+    def student_t_var(
+        self, 
+        confidence: float = 0.95, 
+        position_value: float = 1000000
+    ) -> Tuple[float, float]:
+        df, loc, scale = self.t_params()
+        var_pct = float(stats.t.ppf(1 - confidence, df, loc=loc, scale=scale))
+        return -var_pct * position_value, -var_pct
+    
     def cornish_fisher_var(
         self, 
         confidence: float = 0.95, 
@@ -50,9 +127,7 @@ class VaRCalculator:
         S = stats.skew(self.returns)
         K = stats.kurtosis(self.returns)
         z = stats.norm.ppf(1 - confidence)
-        z_cf = (z + (z**2 - 1) * S / 6 + 
-                (z**3 - 3*z) * (K - 3) / 24 - 
-                (2*z**3 - 5*z) * S**2 / 36)
+        z_cf = cornish_fisher_z(z, S, K)
         var_pct = mu + z_cf * sigma
         return -var_pct * position_value, -var_pct
     
@@ -61,6 +136,8 @@ class VaRCalculator:
         confidence: float = 0.95, 
         position_value: float = 1000000
     ) -> Tuple[float, float]:
+        if self.tracker is not None:
+            return self.tracker.expected_shortfall(confidence, position_value)
         var_threshold = self.returns.quantile(1 - confidence)
         es_pct = self.returns[self.returns <= var_threshold].mean()
         return -es_pct * position_value, -es_pct
@@ -68,11 +145,18 @@ class VaRCalculator:
     def get_all_var_metrics(
         self, 
         confidence: float = 0.95, 
-        position_value: float = 1000000
+        position_value: float = 1000000,
+        mc_method: str = 'simulation',
+        seed: Optional[int] = None
     ) -> dict:
         parametric = self.parametric_var(confidence, position_value)
         historical = self.historical_var(confidence, position_value)
-        monte_carlo = self.monte_carlo_var(confidence, position_value)
+        if mc_method == 'simulation':
+            monte_carlo = self.monte_carlo_var(confidence, position_value, seed=seed)
+        elif mc_method == 'analytic':
+            monte_carlo = self.student_t_var(confidence, position_value)
+        else:
+            raise ValueError(f"Unknown Monte Carlo method: {mc_method}")
         cornish_fisher = self.cornish_fisher_var(confidence, position_value)
         es = self.expected_shortfall(confidence, position_value)
         
@@ -82,6 +166,76 @@ class VaRCalculator:
             'parametric_var': {'dollar': parametric[0], 'percent': parametric[1]},
             'historical_var': {'dollar': historical[0], 'percent': historical[1]},
             'monte_carlo_var': {'dollar': monte_carlo[0], 'percent': monte_carlo[1]},
+            'monte_carlo_method': mc_method,
             'cornish_fisher_var': {'dollar': cornish_fisher[0], 'percent': cornish_fisher[1]},
             'expected_shortfall': {'dollar': es[0], 'percent': es[1]}
         }
+    
+    def get_var_surface(
+        self,
+        confidences: Sequence[float],
+        position_values: Sequence[float],
+        mc_method: str = 'analytic',
+        n_sims: int = 10000,
+        seed: Optional[int] = None
+    ) -> dict:
+        conf = np.asarray(confidences, dtype=np.float64)
+        positions = np.asarray(position_values, dtype=np.float64)
+        q = 1 - conf
+        
+        values = self.returns.values.astype(np.float64)
+        sorted_returns = np.sort(values)
+        n = len(sorted_returns)
+        mu = values.mean()
+        sigma = values.std(ddof=1)
+        S = stats.skew(values)
+        K = stats.kurtosis(values)
+        z = stats.norm.ppf(q)
+        
+        pos = (n - 1) * q
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, n - 1)
+        hist_q = sorted_returns[lo] + (pos - lo) * (sorted_returns[hi] - sorted_returns[lo])
+        
+        tail_counts = np.searchsorted(sorted_returns, hist_q, side='right')
+        tail_sums = np.concatenate(([0.0], np.cumsum(sorted_returns)))[tail_counts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            es_q = tail_sums / tail_counts
+        
+        if mc_method == 'analytic':
+            df, loc, scale = self.t_params()
+            mc_q = stats.t.ppf(q, df, loc=loc, scale=scale)
+        elif mc_method == 'simulation':
+            rng = np.random.default_rng(seed)
+            simulated = stats.t.rvs(*self.t_params(), size=n_sims, random_state=rng)
+            mc_q = np.percentile(simulated, q * 100)
+        else:
+            raise ValueError(f"Unknown Monte Carlo method: {mc_method}")
+        
+        percents = {
+            'parametric_var': -(mu + z * sigma),
+            'historical_var': -hist_q,
+            'monte_carlo_var': -mc_q,
+            'cornish_fisher_var': -(mu + cornish_fisher_z(z, S, K) * sigma),
+            'expected_shortfall': -es_q,
+        }
+        
+        return {
+            'confidence_levels': conf.tolist(),
+            'position_values': positions.tolist(),
+            'monte_carlo_method': mc_method,
+            'moments': {
+                'mean': float(mu),
+                'std': float(sigma),
+                'skewness': float(S),
+                'kurtosis': float(K),
+                'observations': n
+            },
+            'methods': {
+                name: {
+                    'percent': pct.tolist(),
+                    'dollar': (pct[:, None] * positions[None, :]).tolist()
+                }
+                for name, pct in percents.items()
+            }
+        }
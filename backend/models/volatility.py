@@ -2,56 +2,165 @@
 
 import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Callable, Dict, Optional, Sequence
+
+from .garch import fit_garch_checked, garch_filter, garch_forecast
 
 
 class VolatilityAnalyzer:
-    def __init__(self, prices: pd.Series, freq: str = 'H'):
-        self.prices = prices.copy()
+    def __init__(self, prices: pd.Series, freq: str = 'H', cache_key: Optional[str] = None):
         self.freq = freq
-        self.returns = self.prices.pct_change().dropna()
-        self.returns = self.returns.replace([np.inf, -np.inf], np.nan).dropna()
-        self.log_returns = np.log(self.prices / self.prices.shift(1)).replace(
+        self.cache_key = cache_key
+        self._series_cache: Dict[tuple, object] = {}
+        self.data_version = 0
+        self.set_prices(prices)
+    
+    def set_prices(self, prices: pd.Series):
+        self.prices = prices.copy()
+        self.data_version += 1
+        self._series_cache.clear()
+    
+    def _memoized(self, key: tuple, compute: Callable):
+        key = (self.data_version,) + key
+        if key not in self._series_cache:
+            self._series_cache[key] = compute()
+        return self._series_cache[key]
+    
+    @property
+    def returns(self) -> pd.Series:
+        return self._memoized(('returns',), lambda: self.prices.pct_change().dropna().replace(
+            [np.inf, -np.inf], np.nan
+        ).dropna())
+    
+    @property
+    def log_returns(self) -> pd.Series:
+        return self._memoized(('log_returns',), lambda: np.log(self.prices / self.prices.shift(1)).replace(
             [np.inf, -np.inf], np.nan
-        ).dropna()
+        ).dropna())
         
     def historical_volatility(self, window: int = 24) -> pd.Series:
-        hourly_vol = self.returns.rolling(window=window).std()
-        annualized = hourly_vol * np.sqrt(8760)
-        return annualized
+        def compute():
+            hourly_vol = self.returns.rolling(window=window).std()
+            return hourly_vol * np.sqrt(8760)
+        return self._memoized(('historical', window), compute)
     
     def ewma_volatility(self, lambda_param: float = 0.94) -> pd.Series:
-        squared_returns = self.returns ** 2
-        ewma_var = squared_returns.ewm(alpha=1-lambda_param).mean()
-        return np.sqrt(ewma_var) * np.sqrt(8760)
+        def compute():
+            squared_returns = self.returns ** 2
+            ewma_var = squared_returns.ewm(alpha=1-lambda_param).mean()
+            return np.sqrt(ewma_var) * np.sqrt(8760)
+        return self._memoized(('ewma', lambda_param), compute)
+    
+    def volatility_term_structure(self, windows: Sequence[int] = (24, 168, 720, 8760)) -> pd.DataFrame:
+        def compute():
+            # Rolling std for every window from one pair of prefix sums;
+            # centering first keeps the sum-of-squares difference well conditioned.
+            values = self.returns.values
+            centered = values - values.mean() if len(values) else values
+            c1 = np.concatenate(([0.0], np.cumsum(centered)))
+            c2 = np.concatenate(([0.0], np.cumsum(centered * centered)))
+            columns = {}
+            for w in windows:
+                vol = np.full(len(values), np.nan)
+                if 1 < w <= len(values):
+                    s1 = c1[w:] - c1[:-w]
+                    s2 = c2[w:] - c2[:-w]
+                    var = np.maximum((s2 - s1 * s1 / w) / (w - 1), 0.0)
+                    vol[w - 1:] = np.sqrt(var) * np.sqrt(8760)
+                columns[f'{w}h'] = vol
+            return pd.DataFrame(columns, index=self.returns.index)
+        return self._memoized(('term_structure', tuple(windows)), compute)
+    
+    def fit_garch(self) -> dict:
+        return self._memoized(('garch_fit',), self._fit_garch)
+    
+    def _fit_garch(self) -> dict:
+        (omega, alpha, beta), converged = fit_garch_checked(self.returns.values, self.cache_key)
+        persistence = alpha + beta
+        return {
+            'omega': omega,
+            'alpha': alpha,
+            'beta': beta,
+            'converged': converged,
+            'persistence': persistence,
+            'long_run_volatility': float(np.sqrt(omega / (1 - persistence) * 8760)) if persistence < 1 else None
+        }
     
     def garch_estimate(
         self, 
-        omega: float = 0.00001, 
-        alpha: float = 0.1, 
-        beta: float = 0.85
+        omega: Optional[float] = None, 
+        alpha: Optional[float] = None, 
+        beta: Optional[float] = None
     ) -> pd.Series:
-        returns_clean = self.returns.dropna()
-        n = len(returns_clean)
-        if n == 0:
-            return pd.Series()
+        if omega is None or alpha is None or beta is None:
+            fitted = self.fit_garch()
+            omega, alpha, beta = fitted['omega'], fitted['alpha'], fitted['beta']
         
-        sigma2 = np.zeros(n)
-        sigma2[0] = returns_clean.var()
-        returns_array = returns_clean.values
+        def compute():
+            if len(self.returns) == 0:
+                return pd.Series()
+            sigma2 = garch_filter(self.returns.values, omega, alpha, beta)
+            return pd.Series(np.sqrt(sigma2) * np.sqrt(8760), index=self.returns.index)
+        return self._memoized(('garch', omega, alpha, beta), compute)
+    
+    def garch_forecast(self, horizon: int = 24) -> pd.Series:
+        garch_vol = self.garch_estimate()
+        if len(garch_vol) == 0:
+            return pd.Series()
         
-        for t in range(1, n):
-            sigma2[t] = omega + alpha * returns_array[t-1]**2 + beta * sigma2[t-1]
+        fitted = self.fit_garch()
+        last_sigma2 = (garch_vol.iloc[-1] / np.sqrt(8760)) ** 2
+        forecast = garch_forecast(
+            self.returns.iloc[-1], last_sigma2,
+            fitted['omega'], fitted['alpha'], fitted['beta'], horizon
+        )
         
-        return pd.Series(np.sqrt(sigma2) * np.sqrt(8760), index=returns_clean.index)
+        last = self.returns.index[-1]
+        if isinstance(last, pd.Timestamp):
+            index = pd.date_range(last, periods=horizon + 1, freq='h')[1:]
+        else:
+            index = pd.RangeIndex(1, horizon + 1)
+        return pd.Series(np.sqrt(forecast) * np.sqrt(8760), index=index)
+    
+    def volatility_series(self, n_points: int = 168) -> list:
+        def compute():
+            hist_vol = self.historical_volatility()
+            n = min(n_points, len(hist_vol))
+            if n == 0:
+                return []
+            index = hist_vol.index[-n:]
+            columns = {
+                'historical': hist_vol.values[-n:],
+                'ewma': self.ewma_volatility().values[-n:],
+                'garch': self.garch_estimate().values[-n:],
+            }
+            clean = {
+                name: [float(v) if not np.isnan(v) else None for v in values]
+                for name, values in columns.items()
+            }
+            return [
+                {
+                    'datetime': str(idx),
+                    'historical': clean['historical'][i],
+                    'ewma': clean['ewma'][i],
+                    'garch': clean['garch'][i]
+                }
+                for i, idx in enumerate(index)
+            ]
+        return list(self._memoized(('series', n_points), compute))
     
     def get_summary(self) -> dict:
-        return {
-            'current_historical': float(self.historical_volatility().iloc[-1]) if len(self.historical_volatility()) > 0 else None,
-            'current_ewma': float(self.ewma_volatility().iloc[-1]) if len(self.ewma_volatility()) > 0 else None,
-            'current_garch': float(self.garch_estimate().iloc[-1]) if len(self.garch_estimate()) > 0 else None,
-            'mean_return': float(self.returns.mean()),
-            'return_std': float(self.returns.std()),
-            'skewness': float(self.returns.skew()),
-            'kurtosis': float(self.returns.kurtosis())
-        }
+        def compute():
+            historical = self.historical_volatility()
+            ewma = self.ewma_volatility()
+            garch = self.garch_estimate()
+            return {
+                'current_historical': float(historical.iloc[-1]) if len(historical) > 0 else None,
+                'current_ewma': float(ewma.iloc[-1]) if len(ewma) > 0 else None,
+                'current_garch': float(garch.iloc[-1]) if len(garch) > 0 else None,
+                'mean_return': float(self.returns.mean()),
+                'return_std': float(self.returns.std()),
+                'skewness': float(self.returns.skew()),
+                'kurtosis': float(self.returns.kurtosis())
+            }
+        return dict(self._memoized(('summary',), compute))
@@ -0,0 +1,212 @@
+"""Incremental volatility state updated one hourly price at a time."""
+
+import json
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from .garch import DEFAULT_GARCH_PARAMS, fit_garch
+
+
+ANNUALIZATION = np.sqrt(8760)
+
+
+class VolatilityState:
+    """
+    Running equivalents of VolatilityAnalyzer's historical, EWMA and GARCH
+    volatilities. Each append is O(1); the rolling sums are recomputed from
+    the window once per ``window`` ticks to keep floating-point drift bounded.
+    """
+
+    def __init__(
+        self,
+        window: int = 24,
+        lambda_param: float = 0.94,
+        garch_params: tuple = DEFAULT_GARCH_PARAMS
+    ):
+        self.window = window
+        self.lambda_param = lambda_param
+        self.omega, self.alpha, self.beta = garch_params
+
+        self.last_price: Optional[float] = None
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.count = 0
+
+        self._returns = deque(maxlen=window)
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._since_refresh = 0
+
+        # pandas ewm(adjust=True) is a ratio of two exponentially decayed sums.
+        self._ewma_num = 0.0
+        self._ewma_den = 0.0
+
+        self.last_return: Optional[float] = None
+        self.garch_sigma2: Optional[float] = None
+
+    @classmethod
+    def from_prices(
+        cls,
+        prices: pd.Series,
+        window: int = 24,
+        lambda_param: float = 0.94,
+        cache_key: Optional[str] = None
+    ) -> 'VolatilityState':
+        returns = prices.pct_change().replace([np.inf, -np.inf], np.nan).dropna()
+        params = fit_garch(returns.values, cache_key) if len(returns) else DEFAULT_GARCH_PARAMS
+        state = cls(window, lambda_param, params)
+        if len(returns):
+            state.garch_sigma2 = float(np.var(returns.values, ddof=1)) if len(returns) > 1 else 0.0
+        state.extend(prices)
+        return state
+
+    def append(self, price: float, timestamp=None):
+        price = float(price)
+        if timestamp is not None:
+            self.last_timestamp = pd.Timestamp(timestamp)
+        previous = self.last_price
+        self.last_price = price
+        if previous is None or previous == 0 or not np.isfinite(price):
+            return
+        r = price / previous - 1
+        if not np.isfinite(r):
+            return
+        self._add_return(r)
+
+    def extend(self, prices: pd.Series):
+        for timestamp, price in prices.items():
+            self.append(price, timestamp)
+
+    def sync(self, prices: pd.Series) -> bool:
+        """Append prices newer than the state; False if the state cannot be continued."""
+        if self.last_timestamp is None:
+            return False
+        if len(prices) and prices.index[0] > self.last_timestamp:
+            return False
+        self.extend(prices[prices.index > self.last_timestamp])
+        return True
+
+    def _add_return(self, r: float):
+        if len(self._returns) == self.window:
+            old = self._returns[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._returns.append(r)
+        self._sum += r
+        self._sumsq += r * r
+        self._since_refresh += 1
+        if self._since_refresh >= self.window:
+            values = np.fromiter(self._returns, dtype=np.float64)
+            self._sum = float(values.sum())
+            self._sumsq = float(values @ values)
+            self._since_refresh = 0
+
+        self._ewma_num = self.lambda_param * self._ewma_num + r * r
+        self._ewma_den = self.lambda_param * self._ewma_den + 1.0
+
+        if self.garch_sigma2 is None:
+            self.garch_sigma2 = r * r
+        elif self.last_return is not None:
+            self.garch_sigma2 = (self.omega + self.alpha * self.last_return ** 2 +
+                                 self.beta * self.garch_sigma2)
+        self.last_return = r
+        self.count += 1
+
+    def historical_volatility(self) -> Optional[float]:
+        n = len(self._returns)
+        if n < self.window or n < 2:
+            return None
+        var = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+        return float(np.sqrt(max(var, 0.0)) * ANNUALIZATION)
+
+    def ewma_volatility(self) -> Optional[float]:
+        if self._ewma_den == 0:
+            return None
+        return float(np.sqrt(self._ewma_num / self._ewma_den) * ANNUALIZATION)
+
+    def garch_volatility(self) -> Optional[float]:
+        if self.garch_sigma2 is None:
+            return None
+        return float(np.sqrt(self.garch_sigma2) * ANNUALIZATION)
+
+    def get_summary(self) -> Dict:
+        return {
+            'current_historical': self.historical_volatility(),
+            'current_ewma': self.ewma_volatility(),
+            'current_garch': self.garch_volatility(),
+            'observations': self.count,
+            'last_timestamp': str(self.last_timestamp) if self.last_timestamp is not None else None
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'window': self.window,
+            'lambda_param': self.lambda_param,
+            'garch_params': [self.omega, self.alpha, self.beta],
+            'last_price': self.last_price,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            'count': self.count,
+            'returns': list(self._returns),
+            'ewma_num': self._ewma_num,
+            'ewma_den': self._ewma_den,
+            'last_return': self.last_return,
+            'garch_sigma2': self.garch_sigma2,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'VolatilityState':
+        state = cls(data['window'], data['lambda_param'], tuple(data['garch_params']))
+        state.last_price = data['last_price']
+        state.last_timestamp = pd.Timestamp(data['last_timestamp']) if data['last_timestamp'] else None
+        state.count = data['count']
+        state._returns.extend(data['returns'])
+        state._sum = float(np.sum(data['returns']))
+        state._sumsq = float(np.dot(data['returns'], data['returns']))
+        state._ewma_num = data['ewma_num']
+        state._ewma_den = data['ewma_den']
+        state.last_return = data['last_return']
+        state.garch_sigma2 = data['garch_sigma2']
+        return state
+
+    def save(self, path: str):
+        # Per-process temp name so concurrent workers never interleave writes.
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['VolatilityState']:
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+# Per-zone states, persisted under VOLATILITY_STATE_DIR so a restarted
+# worker resumes from disk instead of replaying history.
+_states: Dict[str, VolatilityState] = {}
+
+
+def _state_path(key: str) -> str:
+    state_dir = os.getenv('VOLATILITY_STATE_DIR', '/tmp/volt_volatility_state')
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, f'{key}.json')
+
+
+def get_volatility_state(key: str, prices: pd.Series) -> VolatilityState:
+    state = _states.get(key)
+    if state is None:
+        state = VolatilityState.load(_state_path(key))
+    before = (state.count, state.last_timestamp, state.last_price) if state is not None else None
+    if state is None or not state.sync(prices):
+        state = VolatilityState.from_prices(prices, cache_key=key)
+        before = None
+    _states[key] = state
+    # Most requests land within the hour and append nothing; skip the rewrite.
+    if before != (state.count, state.last_timestamp, state.last_price):
+        state.save(_state_path(key))
+    return state
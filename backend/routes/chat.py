@@ -1,24 +1,39 @@
 """Chat endpoint using multi-agent orchestrator."""
 
 from fastapi import APIRouter, Request
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
-from backend.agents.orchestrator import AgentOrchestrator
+from backend.agents.orchestrator import AGENT_TIMEOUT_SECONDS, MAX_AGENT_TIMEOUT_SECONDS, AgentOrchestrator
+from backend.services.agent_cache import get_agent_cache
 
 router = APIRouter()
 
+
+def get_orchestrator(app) -> AgentOrchestrator:
+    """The application-scoped orchestrator, created with the app's connection on first use."""
+    orchestrator = getattr(app.state, 'orchestrator', None)
+    if orchestrator is None:
+        orchestrator = AgentOrchestrator(app.state.snow_conn)
+        app.state.orchestrator = orchestrator
+    return orchestrator
+
+
 class ChatRequest(BaseModel):
     message: str
     context: Optional[str] = None
+    fan_out: bool = False
+    timeout: float = Field(AGENT_TIMEOUT_SECONDS, gt=0, le=MAX_AGENT_TIMEOUT_SECONDS)
 
 @router.post("")
 async def chat(request: Request, chat_request: ChatRequest):
     """Process a chat message through the agent orchestrator."""
-    orchestrator = AgentOrchestrator(request.app.state.snow_conn)
+    orchestrator = get_orchestrator(request.app)
     
     result = await orchestrator.process_query(
         chat_request.message,
-        chat_request.context
+        chat_request.context,
+        fan_out=chat_request.fan_out,
+        timeout=chat_request.timeout
     )
     
     return {
@@ -26,5 +41,31 @@ async def chat(request: Request, chat_request: ChatRequest):
         "agent": result['agent'],
         "intent": result['intent'],
         "data": result.get('data'),
-        "sources": result.get('sources', [])
+        "sources": result.get('sources', []),
+        "agents": result.get('agents')
     }
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Hit rates, entries and change-probe state of the agent data cache."""
+    return get_agent_cache().stats()
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(
+    request: Request,
+    table: Optional[str] = None,
+    agent: Optional[str] = None,
+    probe: bool = False
+):
+    """
+    Hook for jobs that write the model registry or pattern tables: drop the
+    entries read from ``table`` (or owned by ``agent``, or everything), or
+    with ``probe`` re-check the watched tables' commit times immediately.
+    """
+    cache = get_agent_cache()
+    if probe:
+        changed = cache.check_for_changes(request.app.state.snow_conn, force=True)
+        return {"changed_tables": changed, "stats": cache.stats()}
+    return {"invalidated": cache.invalidate(table=table, agent=agent), "stats": cache.stats()}
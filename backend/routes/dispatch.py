@@ -1,16 +1,86 @@
 """Dispatch simulation routes - stress testing and event replay."""
 
 from fastapi import APIRouter, Request, Query
-from typing import Optional
+from pydantic import BaseModel
+from typing import List, Optional
 import pandas as pd
 import sys
 sys.path.insert(0, '..')
-from backend.models.stress_tester import StressTester, PREDEFINED_SCENARIOS
+from backend.models.stress_tester import (
+    StressTester, PREDEFINED_SCENARIOS, run_scenario_grid, get_window_library
+)
+from backend.models.spike_episodes import get_episode_index
+from backend.services.price_stats import get_zone_price_stats
+from backend.services import scenario_registry
 
 router = APIRouter()
 
+DISPATCH_ZONES = ['HOUSTON', 'NORTH', 'SOUTH', 'WEST']
 
-def get_price_data(cursor, zone: str = 'LZ_HOUSTON', days: int = 90) -> pd.Series:
+# DART_LOADS keys load zones by their own object IDs, not the LZ_ price
+# node's (see cortex/power_utilities_semantic_model.yaml).
+LOAD_ZONE_OBJECT_IDS = {
+    'NORTH': 10000712969,
+    'SOUTH': 10000712970,
+    'WEST': 10000712971,
+    'HOUSTON': 10000712972,
+}
+
+
+class CustomScenario(BaseModel):
+    name: str
+    price_level: float
+    duration_hours: int
+    description: str = ''
+
+
+class ScenarioGridRequest(BaseModel):
+    capacities_mw: List[float] = [25, 50, 100, 200, 500]
+    zones: List[str] = DISPATCH_ZONES
+    custom_scenarios: List[CustomScenario] = []
+
+
+class ShapedScenarioRequest(BaseModel):
+    name: str = 'custom_shape'
+    hourly_prices: List[float]
+    profile_mw: Optional[List[float]] = None
+    capacity_mw: float = 100
+    zone: str = 'HOUSTON'
+    description: str = ''
+
+
+class ReplayRequest(BaseModel):
+    start: str
+    hours: int = 24
+    zone: str = 'HOUSTON'
+    days: int = 365
+    profile_mw: Optional[List[float]] = None
+    capacity_mw: float = 100
+
+
+def shaped_result(tester: StressTester, key: str, profile) -> dict:
+    impacts = tester.shaped_impacts(profile, [key])
+    scenario = tester.scenarios[key]
+    hourly = impacts['hourly_savings'][0][:scenario['duration_hours']]
+    return {
+        'scenario': scenario['name'],
+        'description': scenario['description'],
+        'source': scenario['source'],
+        'base_price': tester.base_price,
+        'avg_price': scenario['price_level'],
+        'peak_price': scenario['peak_price'],
+        'duration_hours': scenario['duration_hours'],
+        'total_savings': float(impacts['total_savings'][0]),
+        'total_mwh': float(impacts['total_mwh'][0]),
+        'peak_hour_savings': float(impacts['peak_hour_savings'][0]),
+        'hourly_prices': scenario['price_shape'].tolist(),
+        'hourly_savings': hourly.tolist(),
+    }
+
+
+def get_price_data(
+    cursor, zone: str = 'LZ_HOUSTON', days: int = 90, positive_only: bool = True
+) -> pd.Series:
     try:
         cursor.execute(f"""
             SELECT d.DATETIME, d.RTLMP as RT_PRICE
@@ -28,15 +98,26 @@ def get_price_data(cursor, zone: str = 'LZ_HOUSTON', days: int = 90) -> pd.Serie
         df['DATETIME'] = pd.to_datetime(df['DATETIME'])
         df['RT_PRICE'] = pd.to_numeric(df['RT_PRICE'], errors='coerce')
         prices = df.set_index('DATETIME')['RT_PRICE'].dropna()
-        prices = prices[prices > 0]
+        if positive_only:
+            prices = prices[prices > 0]
         return prices
     except Exception as e:
         print(f"Error fetching price data: {e}")
         return pd.Series(dtype=float)
 
 
+def add_saved_scenarios(tester: StressTester, cursor):
+    for saved in scenario_registry.load_scenarios(cursor):
+        if saved['key'] not in tester.scenarios:
+            tester.add_custom_scenario(
+                saved['key'], saved['price_level'], saved['duration_hours'], saved['description']
+            )
+            tester.scenarios[saved['key']]['name'] = saved['name']
+
+
 @router.get("/scenarios")
-async def list_scenarios():
+async def list_scenarios(request: Request):
+    cursor = request.app.state.snow_conn.cursor()
     return {
         'scenarios': [
             {
@@ -47,10 +128,21 @@ async def list_scenarios():
                 'description': s['description']
             }
             for key, s in PREDEFINED_SCENARIOS.items()
-        ]
+        ],
+        'saved_scenarios': scenario_registry.load_scenarios(cursor)
     }
 
 
+@router.get("/price-stats/{zone}")
+async def get_price_stats(
+    request: Request,
+    zone: str,
+    days: int = Query(365, description="Days of historical data")
+):
+    cursor = request.app.state.snow_conn.cursor()
+    return get_zone_price_stats(cursor, f'LZ_{zone.upper()}', days)
+
+
 @router.get("/simulate/{scenario_key}")
 async def simulate_scenario(
     request: Request,
@@ -59,19 +151,18 @@ async def simulate_scenario(
     zone: str = Query('HOUSTON', description="Zone for base price calculation")
 ):
     cursor = request.app.state.snow_conn.cursor()
-    prices = get_price_data(cursor, f'LZ_{zone.upper()}', 365)
+    if scenario_key not in PREDEFINED_SCENARIOS:
+        saved = scenario_registry.get_saved_impacts(cursor, f'LZ_{zone.upper()}', capacity_mw, scenario_key)
+        if saved:
+            return {**saved[0], 'zone': zone}
     
-    if prices.empty:
-        base_price = 50.0
-    else:
-        base_price = float(prices.mean())
-    
-    tester = StressTester(prices if not prices.empty else pd.Series([50.0]))
+    price_stats = get_zone_price_stats(cursor, f'LZ_{zone.upper()}', 365)
+    tester = StressTester(base_price=price_stats['base_price'])
     
     try:
         result = tester.calculate_scenario_impact(scenario_key, capacity_mw, is_generator=False)
         result['zone'] = zone
-        result['base_price_source'] = 'historical' if not prices.empty else 'default'
+        result['base_price_source'] = price_stats['base_price_source']
         return result
     except ValueError as e:
         return {"error": str(e)}
@@ -84,9 +175,10 @@ async def simulate_all_scenarios(
     zone: str = Query('HOUSTON', description="Zone for base price calculation")
 ):
     cursor = request.app.state.snow_conn.cursor()
-    prices = get_price_data(cursor, f'LZ_{zone.upper()}', 365)
+    price_stats = get_zone_price_stats(cursor, f'LZ_{zone.upper()}', 365)
     
-    tester = StressTester(prices if not prices.empty else pd.Series([50.0]))
+    tester = StressTester(base_price=price_stats['base_price'])
+    add_saved_scenarios(tester, cursor)
     results = tester.run_all_scenarios(capacity_mw, is_generator=False)
     
     total_potential = sum(r.get('total_savings', 0) for r in results)
@@ -101,53 +193,71 @@ async def simulate_all_scenarios(
     }
 
 
+@router.post("/scenario-grid")
+async def simulate_scenario_grid(request: Request, grid_request: ScenarioGridRequest):
+    cursor = request.app.state.snow_conn.cursor()
+    
+    base_prices = {}
+    base_price_source = {}
+    for zone in grid_request.zones:
+        price_stats = get_zone_price_stats(cursor, f'LZ_{zone.upper()}', 365)
+        base_prices[zone] = price_stats['base_price']
+        base_price_source[zone] = price_stats['base_price_source']
+    
+    tester = StressTester()
+    add_saved_scenarios(tester, cursor)
+    for custom in grid_request.custom_scenarios:
+        tester.add_custom_scenario(custom.name, custom.price_level, custom.duration_hours, custom.description)
+    
+    result = run_scenario_grid(tester.scenarios, grid_request.capacities_mw, base_prices)
+    result['base_price_source'] = base_price_source
+    return result
+
+
 @router.get("/historical-events")
 async def get_historical_events(
     request: Request,
     threshold_price: float = Query(500, description="Price threshold to identify events"),
-    zone: str = Query('HOUSTON', description="Zone to analyze")
+    zone: str = Query('HOUSTON', description="Zone to analyze"),
+    page: int = Query(1, description="Episode page number"),
+    page_size: int = Query(50, description="Episodes per page")
 ):
-    cursor = request.app.state.snow_conn.cursor()
+    index = get_episode_index(f'LZ_{zone.upper()}', threshold_price)
     
-    cursor.execute(f"""
-        SELECT 
-            d.DATETIME,
-            d.RTLMP as RT_PRICE,
-            d.DALMP as DA_PRICE
-        FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_PRICES d
-        JOIN YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DS_OBJECT_LIST o 
-            ON d.OBJECTID = o.OBJECTID
-        WHERE o.OBJECTNAME = 'LZ_{zone.upper()}'
-          AND d.RTLMP >= {threshold_price}
-          AND d.DATETIME >= '2025-01-01'
-        ORDER BY d.DATETIME
-    """)
-    
-    rows = cursor.fetchall()
-    
-    events = []
-    for row in rows:
-        events.append({
-            'datetime': str(row[0]),
-            'rt_price': float(row[1]) if row[1] else 0,
-            'da_price': float(row[2]) if row[2] else 0,
-            'spread': float(row[1] - row[2]) if row[1] and row[2] else 0
-        })
-    
-    if events:
-        avg_spike_price = sum(e['rt_price'] for e in events) / len(events)
-        max_spike_price = max(e['rt_price'] for e in events)
-    else:
-        avg_spike_price = 0
-        max_spike_price = 0
+    if index.is_stale():
+        since = f"'{index.last_datetime}'" if index.last_datetime is not None else "'2025-01-01'"
+        op = '>' if index.last_datetime is not None else '>='
+        load_object_id = LOAD_ZONE_OBJECT_IDS.get(zone.upper())
+        load_join = (
+            f"l.OBJECTID = {load_object_id} AND l.DATETIME = d.DATETIME"
+            if load_object_id is not None else "FALSE"
+        )
+        cursor = request.app.state.snow_conn.cursor()
+        cursor.execute(f"""
+            SELECT 
+                d.DATETIME,
+                d.RTLMP as RT_PRICE,
+                d.DALMP as DA_PRICE,
+                l.RTLOAD as LOAD_MW
+            FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_PRICES d
+            JOIN YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DS_OBJECT_LIST o 
+                ON d.OBJECTID = o.OBJECTID
+            LEFT JOIN YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_LOADS l
+                ON {load_join}
+            WHERE o.OBJECTNAME = 'LZ_{zone.upper()}'
+              AND d.RTLMP >= {threshold_price}
+              AND d.DATETIME {op} {since}
+            ORDER BY d.DATETIME
+        """)
+        rows = cursor.fetchall()
+        index.append(pd.DataFrame(rows, columns=['DATETIME', 'RT_PRICE', 'DA_PRICE', 'LOAD_MW']))
     
     return {
         'zone': zone,
         'threshold_price': threshold_price,
-        'event_count': len(events),
-        'avg_spike_price': avg_spike_price,
-        'max_spike_price': max_spike_price,
-        'events': events[:100]
+        **index.summary(),
+        'events': index.hourly_events(100),
+        **index.page(page, page_size)
     }
 
 
@@ -158,16 +268,130 @@ async def create_custom_scenario(
     price_level: float = Query(..., description="Stress price level"),
     duration_hours: int = Query(..., description="Duration in hours"),
     capacity_mw: float = Query(100, description="DR capacity in MW"),
-    zone: str = Query('HOUSTON', description="Zone")
+    zone: str = Query('HOUSTON', description="Zone"),
+    description: str = Query('', description="Scenario description")
 ):
     cursor = request.app.state.snow_conn.cursor()
-    prices = get_price_data(cursor, f'LZ_{zone.upper()}', 365)
+    price_stats = get_zone_price_stats(cursor, f'LZ_{zone.upper()}', 365)
     
-    tester = StressTester(prices if not prices.empty else pd.Series([50.0]))
-    tester.add_custom_scenario(name, price_level, duration_hours)
+    tester = StressTester(base_price=price_stats['base_price'])
+    tester.add_custom_scenario(name, price_level, duration_hours, description)
     
     result = tester.calculate_scenario_impact(name, capacity_mw, is_generator=False)
     result['zone'] = zone
     result['custom'] = True
     
+    try:
+        saved = scenario_registry.save_scenario(cursor, name, price_level, duration_hours, description)
+        scenario_registry.merge_zone_impacts(cursor, f'LZ_{zone.upper()}', price_stats, force=True)
+        result['scenario_key'] = saved['key']
+        result['saved'] = True
+    except Exception as e:
+        print(f"Error saving custom scenario: {e}")
+        result['saved'] = False
+    
+    return result
+
+
+@router.get("/saved-scenarios")
+async def list_saved_scenarios(
+    request: Request,
+    capacity_mw: float = Query(100, description="DR capacity in MW"),
+    zone: str = Query('HOUSTON', description="Zone for base price calculation")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        results = scenario_registry.get_saved_impacts(cursor, f'LZ_{zone.upper()}', capacity_mw)
+        return {
+            'capacity_mw': capacity_mw,
+            'zone': zone,
+            'scenarios': sorted(results, key=lambda r: r['total_savings'], reverse=True)
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "zone": zone}
+
+
+@router.delete("/saved-scenarios/{scenario_key}")
+async def delete_saved_scenario(request: Request, scenario_key: str):
+    cursor = request.app.state.snow_conn.cursor()
+    return {
+        'scenario_key': scenario_key,
+        'deleted': scenario_registry.delete_scenario(cursor, scenario_key)
+    }
+
+
+@router.post("/shaped-scenario")
+async def simulate_shaped_scenario(request: Request, shaped: ShapedScenarioRequest):
+    if not shaped.hourly_prices:
+        return {"error": "hourly_prices must not be empty"}
+    cursor = request.app.state.snow_conn.cursor()
+    price_stats = get_zone_price_stats(cursor, f'LZ_{shaped.zone.upper()}', 365)
+    
+    tester = StressTester(base_price=price_stats['base_price'])
+    tester.add_shaped_scenario(shaped.name, shaped.hourly_prices, shaped.description)
+    profile = shaped.profile_mw if shaped.profile_mw is not None else shaped.capacity_mw
+    
+    result = shaped_result(tester, shaped.name, profile)
+    result['zone'] = shaped.zone
+    result['base_price_source'] = price_stats['base_price_source']
     return result
+
+
+@router.get("/historical-windows/{zone}")
+async def get_historical_windows(
+    request: Request,
+    zone: str,
+    hours: int = Query(24, description="Window length in hours"),
+    top_n: int = Query(10, description="Number of non-overlapping windows"),
+    days: int = Query(365, description="Days of history to search")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        library = get_window_library(
+            f'LZ_{zone.upper()}', days,
+            lambda: get_price_data(cursor, f'LZ_{zone.upper()}', days, positive_only=False)
+        )
+        return {
+            'zone': zone,
+            'hours': hours,
+            'windows': library.top_windows(hours, top_n)
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "zone": zone}
+
+
+@router.post("/replay-window")
+async def replay_historical_window(request: Request, replay: ReplayRequest):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        zone_key = f'LZ_{replay.zone.upper()}'
+        library = get_window_library(
+            zone_key, replay.days,
+            lambda: get_price_data(cursor, zone_key, replay.days, positive_only=False)
+        )
+        prices = library.window(replay.start, replay.hours)
+        if len(prices) == 0:
+            return {"error": f"No prices at or after {replay.start}", "zone": replay.zone}
+        
+        price_stats = get_zone_price_stats(cursor, zone_key, 365)
+        tester = StressTester(base_price=price_stats['base_price'])
+        key = f'replay_{replay.start}'
+        tester.add_shaped_scenario(
+            key, prices,
+            f'Replay of {len(prices)} hours from {replay.start}',
+            {'kind': 'historical', 'zone': replay.zone, 'start': replay.start}
+        )
+        profile = replay.profile_mw if replay.profile_mw is not None else replay.capacity_mw
+        
+        result = shaped_result(tester, key, profile)
+        result['zone'] = replay.zone
+        result['base_price_source'] = price_stats['base_price_source']
+        return result
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "zone": replay.zone}
@@ -1,15 +1,49 @@
 """Peak prediction and 4CP probability routes."""
 
 from fastapi import APIRouter, Request, Query
-from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import numpy as np
 import pandas as pd
 import sys
 sys.path.insert(0, '..')
 from backend.models.peak_predictor import PeakPredictor
+from backend.models.dr_optimizer import (
+    DRScheduleOptimizer, MAX_EVENTS, MAX_FACILITIES, MAX_SCHEDULE_HOURS
+)
+from backend.models.fourcp_table import get_fourcp_table
+from backend.models.fourcp_season import get_season_simulator
+from backend.services.system_load import get_system_load_index
 
 router = APIRouter()
 
 
+class ProbabilityCurveRequest(BaseModel):
+    datetimes: List[str]
+    load_mw: List[float]
+    temp_f: List[float]
+    zones: Optional[List[str]] = None
+
+
+class DRFacility(BaseModel):
+    name: str
+    capacity_mw: float
+    cost_per_mwh: float = 0.0
+
+
+class DRScheduleRequest(BaseModel):
+    datetimes: List[str] = Field(..., max_length=MAX_SCHEDULE_HOURS)
+    probability: Optional[List[float]] = None
+    load_mw: Optional[List[float]] = None
+    temp_f: Optional[List[float]] = None
+    facilities: List[DRFacility] = Field(..., max_length=MAX_FACILITIES)
+    max_events: int = Field(10, ge=0, le=MAX_EVENTS)
+    max_event_hours: int = Field(4, ge=1, le=24)
+    min_rest_hours: int = Field(0, ge=0, le=168)
+    transmission_rate: float = 85.0
+
+
 @router.get("/probability")
 async def get_4cp_probability(
     request: Request,
@@ -19,33 +53,18 @@ async def get_4cp_probability(
     month: int = Query(8, description="Month (1-12)")
 ):
     try:
-        cursor = request.app.state.snow_conn.cursor()
-        cursor.execute("""
-            SELECT DATETIME, TOTAL_LOAD_MW 
-            FROM (
-                SELECT d.DATETIME, SUM(d.RTLOAD) as TOTAL_LOAD_MW
-                FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_LOADS d
-                WHERE d.DATETIME >= DATEADD('month', -6, CURRENT_DATE())
-                GROUP BY d.DATETIME
-                ORDER BY d.DATETIME DESC
-                LIMIT 1000
-            )
-        """)
-        
-        rows = cursor.fetchall()
-        if rows:
-            load_df = pd.DataFrame(rows, columns=['DATETIME', 'TOTAL_LOAD_MW'])
-            load_df['TOTAL_LOAD_MW'] = pd.to_numeric(load_df['TOTAL_LOAD_MW'], errors='coerce')
-        else:
-            load_df = pd.DataFrame()
+        # Built and refreshed in the background; until the first build lands
+        # the probability is returned without load context.
+        load_index = get_system_load_index(request.app.state.snow_conn)
         
-        predictor = PeakPredictor(load_df)
+        predictor = PeakPredictor(pd.DataFrame(), table=get_fourcp_table())
         result = predictor.calculate_4cp_probability(
             current_load_mw=load_mw,
             forecast_temp_f=temp_f,
             hour=hour,
             month=month
         )
+        result['load_context'] = load_index.compare(load_mw)
         
         return result
     except Exception as e:
@@ -54,6 +73,145 @@ async def get_4cp_probability(
         return {"error": str(e), "probability": 0.0}
 
 
+@router.post("/probability-curve")
+async def get_4cp_probability_curve(request: Request, curve: ProbabilityCurveRequest):
+    n = len(curve.datetimes)
+    if len(curve.load_mw) != n or len(curve.temp_f) != n or (curve.zones is not None and len(curve.zones) != n):
+        return {"error": "datetimes, load_mw, temp_f and zones must have the same length"}
+    try:
+        forecast = pd.DataFrame({
+            'DATETIME': pd.to_datetime(curve.datetimes),
+            'ZONE': curve.zones if curve.zones is not None else None,
+            'LOAD_MW': curve.load_mw,
+            'TEMP_F': curve.temp_f,
+        })
+        scored = PeakPredictor(pd.DataFrame(), table=get_fourcp_table()).score_forecast(forecast)
+        
+        probability = scored['PROBABILITY'].values
+        risk_counts = scored['RISK_LEVEL'].value_counts()
+        peak = int(np.argmax(probability)) if n else None
+        curve_points = [
+            {
+                'datetime': str(ts),
+                'zone': zone,
+                'probability': float(p),
+                'risk_level': risk,
+                'factors': {
+                    'peak_hour': float(f_hour),
+                    'temperature': float(f_temp),
+                    'load_level': float(f_load),
+                    'weekday': float(f_weekday),
+                }
+            }
+            for ts, zone, p, risk, f_hour, f_temp, f_load, f_weekday in zip(
+                scored['DATETIME'], scored['ZONE'], probability, scored['RISK_LEVEL'],
+                scored['PEAK_HOUR_FACTOR'], scored['TEMPERATURE_FACTOR'],
+                scored['LOAD_LEVEL_FACTOR'], scored['WEEKDAY_FACTOR']
+            )
+        ]
+        
+        return {
+            'points': n,
+            'max_probability': float(probability[peak]) if n else 0.0,
+            'max_probability_datetime': str(scored['DATETIME'].iloc[peak]) if n else None,
+            'risk_level_hours': {level: int(count) for level, count in risk_counts.items()},
+            'curve': curve_points
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "points": n}
+
+
+@router.get("/season-outlook")
+async def get_4cp_season_outlook(
+    request: Request,
+    n_scenarios: int = Query(2000, ge=100, le=5000, description="Number of simulated weather/load trajectories")
+):
+    try:
+        simulator = get_season_simulator(n_scenarios)
+        if simulator is None:
+            return {"error": "4CP season model has not been built (python -m backend.services.fourcp_history)"}
+        
+        snapshot = get_system_load_index(request.app.state.snow_conn).snapshot
+        if not len(snapshot.hourly):
+            return {"error": "System load index is still building", "in_season": None}
+        
+        # The simulation starts at the first unobserved hour; "today" and the
+        # prior-day cutoff follow it, so a full-day batch ending at 23:00
+        # counts as a prior day rather than as today's observations.
+        now = snapshot.hourly.index[-1]
+        start = now + pd.Timedelta(hours=1)
+        today = start.normalize()
+        observed_today = snapshot.hourly[snapshot.hourly.index >= today]
+        prior_days = snapshot.daily_peaks[
+            (snapshot.daily_peaks.index < today) &
+            (snapshot.daily_peaks.index >= today.replace(day=1))
+        ]
+        
+        # A cold day's simulation is CPU-bound; keep it off the event loop.
+        result = await run_in_threadpool(
+            simulator.simulate,
+            start,
+            prior_peak_mw=float(prior_days.max()) if len(prior_days) else 0.0,
+            observed_today=observed_today.values
+        )
+        result['as_of'] = str(now)
+        return result
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "in_season": None}
+
+
+@router.post("/dr-schedule")
+async def optimize_dr_schedule(request: Request, schedule: DRScheduleRequest):
+    n = len(schedule.datetimes)
+    try:
+        index = pd.DatetimeIndex(pd.to_datetime(schedule.datetimes))
+        if schedule.probability is not None:
+            probability = np.asarray(schedule.probability, dtype=np.float64)
+            source = 'caller'
+        elif schedule.load_mw is not None and schedule.temp_f is not None:
+            table = get_fourcp_table()
+            scored = PeakPredictor(pd.DataFrame(), table=table).score_forecast(pd.DataFrame({
+                'DATETIME': index, 'LOAD_MW': schedule.load_mw, 'TEMP_F': schedule.temp_f
+            }))
+            probability = scored['PROBABILITY'].values
+            source = 'empirical' if table is not None else 'heuristic'
+        else:
+            return {"error": "Provide probability, or load_mw and temp_f to score"}
+        if len(probability) != n:
+            return {"error": "Curve length does not match datetimes"}
+        
+        optimizer = DRScheduleOptimizer(
+            schedule.max_events, schedule.max_event_hours, schedule.min_rest_hours
+        )
+        facilities = optimizer.get_schedules(
+            index, probability, [f.model_dump() for f in schedule.facilities], schedule.transmission_rate
+        )
+        return {
+            'hours': n,
+            'constraints': {
+                'max_events': schedule.max_events,
+                'max_event_hours': schedule.max_event_hours,
+                'min_rest_hours': schedule.min_rest_hours,
+            },
+            'transmission_rate': schedule.transmission_rate,
+            'probability_source': source,
+            'warning': (
+                "No 4CP table is built; heuristic scores are not calibrated probabilities, "
+                "so savings are indicative only" if source == 'heuristic' else None
+            ),
+            'facilities': facilities,
+            'total_net_value': sum(f['net_value'] for f in facilities)
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "hours": n}
+
+
 @router.get("/historical")
 async def get_historical_peaks(
     request: Request,
@@ -112,7 +270,7 @@ async def get_current_conditions(request: Request):
         
         from datetime import datetime
         now = datetime.now()
-        predictor = PeakPredictor(pd.DataFrame())
+        predictor = PeakPredictor(pd.DataFrame(), table=get_fourcp_table())
         
         probability = predictor.calculate_4cp_probability(
             current_load_mw=current_load,
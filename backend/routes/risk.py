@@ -1,17 +1,27 @@
 """Risk analytics routes - VaR, volatility, Monte Carlo."""
 
 from fastapi import APIRouter, Request, Query
-from typing import Optional
+from typing import List, Optional
 import pandas as pd
 import numpy as np
 import sys
 sys.path.insert(0, '..')
 from backend.models.volatility import VolatilityAnalyzer
+from backend.models.volatility_state import get_volatility_state
 from backend.models.var_calculator import VaRCalculator
+from backend.models.var_backtest import VaRBacktester
+from backend.models.streaming_var import get_var_tracker
 from backend.models.monte_carlo import MonteCarloSimulator
+from backend.models.portfolio_var import PortfolioVaRCalculator
+from backend.models.correlation import MultiAssetVolatilityAnalyzer
 
 router = APIRouter()
 
+SETTLEMENT_POINTS = [
+    'LZ_HOUSTON', 'LZ_NORTH', 'LZ_SOUTH', 'LZ_WEST',
+    'HB_HOUSTON', 'HB_NORTH', 'HB_SOUTH', 'HB_WEST',
+]
+
 
 def get_price_data(cursor, zone: str = 'LZ_HOUSTON', days: int = 90) -> pd.Series:
     try:
@@ -38,11 +48,53 @@ def get_price_data(cursor, zone: str = 'LZ_HOUSTON', days: int = 90) -> pd.Serie
         return pd.Series(dtype=float)
 
 
+def get_crr_positions(cursor) -> pd.DataFrame:
+    cursor.execute("""
+        SELECT CRR_ID, SOURCE_ZONE, SINK_ZONE, MW_QUANTITY
+        FROM POWER_UTILITIES_DB.ATOMIC.CRR_POSITION
+        WHERE STATUS = 'Active'
+          AND EFFECTIVE_DATE <= CURRENT_DATE()
+          AND (EXPIRATION_DATE IS NULL OR EXPIRATION_DATE >= CURRENT_DATE())
+    """)
+    rows = cursor.fetchall()
+    positions = pd.DataFrame(rows, columns=['CRR_ID', 'SOURCE_ZONE', 'SINK_ZONE', 'MW_QUANTITY'])
+    positions['MW_QUANTITY'] = pd.to_numeric(positions['MW_QUANTITY'], errors='coerce').fillna(0.0)
+    return positions
+
+
+def zone_object_name(zone: str) -> str:
+    """DS_OBJECT_LIST name for a zone code (HOUSTON -> LZ_HOUSTON); settlement point names pass through."""
+    zone = zone.upper()
+    return zone if zone.startswith(('LZ_', 'HB_')) else f'LZ_{zone}'
+
+
+def get_node_price_matrix(cursor, nodes: List[str], days: int = 90) -> pd.DataFrame:
+    if not nodes:
+        return pd.DataFrame()
+    node_list = ", ".join(f"'{n}'" for n in nodes)
+    cursor.execute(f"""
+        SELECT d.DATETIME, o.OBJECTNAME, d.RTLMP as RT_PRICE
+        FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_PRICES d
+        JOIN YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DS_OBJECT_LIST o 
+            ON d.OBJECTID = o.OBJECTID
+        WHERE o.OBJECTNAME IN ({node_list})
+          AND d.DATETIME >= DATEADD('day', -{days}, CURRENT_DATE())
+    """)
+    rows = cursor.fetchall()
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows, columns=['DATETIME', 'NODE', 'RT_PRICE'])
+    df['DATETIME'] = pd.to_datetime(df['DATETIME'])
+    df['RT_PRICE'] = pd.to_numeric(df['RT_PRICE'], errors='coerce')
+    return df.pivot_table(index='DATETIME', columns='NODE', values='RT_PRICE', aggfunc='mean')
+
+
 @router.get("/volatility/{zone}")
 async def get_volatility(
     request: Request,
     zone: str,
-    days: int = Query(90, description="Days of historical data")
+    days: int = Query(90, description="Days of historical data"),
+    forecast_hours: int = Query(24, description="GARCH forecast horizon in hours")
 ):
     try:
         cursor = request.app.state.snow_conn.cursor()
@@ -51,39 +103,27 @@ async def get_volatility(
         if prices.empty:
             return {"error": "No price data found", "zone": zone}
         
-        analyzer = VolatilityAnalyzer(prices)
+        analyzer = VolatilityAnalyzer(prices, cache_key=f'LZ_{zone.upper()}')
         summary = analyzer.get_summary()
         
         for key, val in summary.items():
             if val is not None and (np.isnan(val) or np.isinf(val)):
                 summary[key] = None
         
-        hist_vol = analyzer.historical_volatility()
-        ewma_vol = analyzer.ewma_volatility()
-        garch_vol = analyzer.garch_estimate()
+        recent_vol = analyzer.volatility_series(168)
         
-        recent_vol = []
-        n_points = min(168, len(hist_vol))
-        for i in range(-n_points, 0):
-            try:
-                idx = hist_vol.index[i]
-                h_val = float(hist_vol.iloc[i]) if not np.isnan(hist_vol.iloc[i]) else None
-                e_val = float(ewma_vol.iloc[i]) if i < len(ewma_vol) and not np.isnan(ewma_vol.iloc[i]) else None
-                g_val = float(garch_vol.iloc[i]) if i < len(garch_vol) and not np.isnan(garch_vol.iloc[i]) else None
-                recent_vol.append({
-                    'datetime': str(idx),
-                    'historical': h_val,
-                    'ewma': e_val,
-                    'garch': g_val
-                })
-            except (IndexError, ValueError):
-                continue
+        garch_forecast = analyzer.garch_forecast(forecast_hours)
         
         return {
             'zone': zone,
             'days_analyzed': days,
             'data_points': len(prices),
             'summary': summary,
+            'garch_params': analyzer.fit_garch(),
+            'garch_forecast': [
+                {'datetime': str(idx), 'garch': float(val) if np.isfinite(val) else None}
+                for idx, val in garch_forecast.items()
+            ],
             'volatility_series': recent_vol[-48:]
         }
     except Exception as e:
@@ -92,13 +132,82 @@ async def get_volatility(
         return {"error": str(e), "zone": zone}
 
 
+@router.get("/volatility-term-structure/{zone}")
+async def get_volatility_term_structure(
+    request: Request,
+    zone: str,
+    window: List[int] = Query([24, 168, 720, 8760], description="Realized volatility windows in hours"),
+    days: int = Query(400, description="Days of historical data"),
+    n_points: int = Query(168, description="Number of recent aligned points to return")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        prices = get_price_data(cursor, f'LZ_{zone.upper()}', days)
+        
+        if prices.empty:
+            return {"error": "No price data found", "zone": zone}
+        
+        analyzer = VolatilityAnalyzer(prices, cache_key=f'LZ_{zone.upper()}')
+        term_structure = analyzer.volatility_term_structure(sorted(set(window)))
+        recent = term_structure.iloc[-n_points:]
+        
+        def clean(val):
+            return float(val) if np.isfinite(val) else None
+        
+        return {
+            'zone': zone,
+            'days_analyzed': days,
+            'data_points': len(prices),
+            'windows': list(term_structure.columns),
+            'current': {col: clean(term_structure[col].iloc[-1]) for col in term_structure.columns},
+            'series': [
+                {'datetime': str(idx), **{col: clean(val) for col, val in row.items()}}
+                for idx, row in recent.iterrows()
+            ]
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "zone": zone}
+
+
+@router.get("/correlation")
+async def get_correlation(
+    request: Request,
+    point: List[str] = Query(SETTLEMENT_POINTS, description="Settlement points (zones and hubs)"),
+    days: int = Query(90, description="Days of historical data"),
+    window: int = Query(168, description="Rolling window in hours"),
+    lambda_param: float = Query(0.94, description="EWMA decay factor"),
+    step: int = Query(24, description="Hours between history points"),
+    history_points: int = Query(30, description="Number of history points to return")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        node_prices = get_node_price_matrix(cursor, [p.upper() for p in point], days)
+        
+        if node_prices.empty:
+            return {"error": "No price data found", "points": point}
+        
+        analyzer = MultiAssetVolatilityAnalyzer(node_prices)
+        result = analyzer.get_correlation_summary(window, lambda_param, step, history_points)
+        result['days_analyzed'] = days
+        
+        return result
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "points": point}
+
+
 @router.get("/var/{zone}")
 async def get_var_metrics(
     request: Request,
     zone: str,
     confidence: float = Query(0.95, description="VaR confidence level"),
     position_value: float = Query(1000000, description="Position value in dollars"),
-    days: int = Query(90, description="Days of historical data")
+    days: int = Query(90, description="Days of historical data"),
+    mc_method: str = Query('simulation', description="Monte Carlo VaR method: simulation, analytic"),
+    seed: Optional[int] = Query(42, description="Random seed for the Monte Carlo simulation")
 ):
     try:
         cursor = request.app.state.snow_conn.cursor()
@@ -108,9 +217,11 @@ async def get_var_metrics(
             return {"error": "No price data found", "zone": zone}
         
         returns = prices.pct_change().replace([np.inf, -np.inf], np.nan).dropna()
-        calculator = VaRCalculator(returns)
+        tracker = get_var_tracker(f'LZ_{zone.upper()}:{days}')
+        tracker.sync(returns)
+        calculator = VaRCalculator(returns, cache_key=f'LZ_{zone.upper()}', tracker=tracker)
         
-        metrics = calculator.get_all_var_metrics(confidence, position_value)
+        metrics = calculator.get_all_var_metrics(confidence, position_value, mc_method, seed)
         metrics['zone'] = zone
         metrics['days_analyzed'] = days
         
@@ -121,6 +232,106 @@ async def get_var_metrics(
         return {"error": str(e), "zone": zone}
 
 
+@router.get("/var-surface/{zone}")
+async def get_var_surface(
+    request: Request,
+    zone: str,
+    confidence: List[float] = Query([0.90, 0.95, 0.975, 0.99], description="VaR confidence levels"),
+    position_value: List[float] = Query([1000000], description="Position values in dollars"),
+    days: int = Query(90, description="Days of historical data"),
+    mc_method: str = Query('analytic', description="Monte Carlo VaR method: simulation, analytic"),
+    seed: Optional[int] = Query(42, description="Random seed for the Monte Carlo simulation")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        prices = get_price_data(cursor, f'LZ_{zone.upper()}', days)
+        
+        if prices.empty:
+            return {"error": "No price data found", "zone": zone}
+        
+        returns = prices.pct_change().replace([np.inf, -np.inf], np.nan).dropna()
+        calculator = VaRCalculator(returns, cache_key=f'LZ_{zone.upper()}')
+        
+        surface = calculator.get_var_surface(confidence, position_value, mc_method, seed=seed)
+        surface['zone'] = zone
+        surface['days_analyzed'] = days
+        
+        return surface
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "zone": zone}
+
+
+@router.get("/var-backtest/{zone}")
+async def get_var_backtest(
+    request: Request,
+    zone: str,
+    confidence: float = Query(0.95, description="VaR confidence level"),
+    window: int = Query(720, description="Rolling estimation window in hours"),
+    days: int = Query(1825, description="Days of historical data")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        prices = get_price_data(cursor, f'LZ_{zone.upper()}', days)
+        
+        if prices.empty:
+            return {"error": "No price data found", "zone": zone}
+        
+        returns = prices.pct_change().replace([np.inf, -np.inf], np.nan).dropna()
+        if len(returns) <= window:
+            return {"error": f"Need more than {window} returns for backtesting", "zone": zone}
+        
+        backtester = VaRBacktester(returns, window=window)
+        result = backtester.evaluate(confidence)
+        result['zone'] = zone
+        result['days_analyzed'] = days
+        result['recent_forecasts'] = backtester.recent_series(confidence)
+        
+        return result
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e), "zone": zone}
+
+
+@router.get("/portfolio-var")
+async def get_portfolio_var(
+    request: Request,
+    confidence: float = Query(0.95, description="VaR confidence level"),
+    method: str = Query('historical', description="Method: historical, delta_normal"),
+    days: int = Query(90, description="Days of historical data"),
+    top_n: int = Query(50, description="Number of largest VaR contributors to return")
+):
+    try:
+        cursor = request.app.state.snow_conn.cursor()
+        positions = get_crr_positions(cursor)
+        
+        if positions.empty:
+            return {"error": "No active CRR positions found"}
+        
+        # CRR_POSITION holds zone codes; prices are keyed by LZ_ object names.
+        zones = sorted(set(positions['SOURCE_ZONE']) | set(positions['SINK_ZONE']))
+        object_names = {zone: zone_object_name(zone) for zone in zones}
+        node_prices = get_node_price_matrix(cursor, sorted(set(object_names.values())), days)
+        node_prices = pd.DataFrame({
+            zone: node_prices[name] for zone, name in object_names.items() if name in node_prices.columns
+        })
+        
+        if node_prices.empty:
+            return {"error": "No price data found for position nodes"}
+        
+        calculator = PortfolioVaRCalculator(positions, node_prices)
+        result = calculator.get_portfolio_metrics(confidence, method, top_n)
+        result['days_analyzed'] = days
+        
+        return result
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e)}
+
+
 @router.get("/monte-carlo/{zone}")
 async def run_monte_carlo(
     request: Request,
@@ -166,12 +377,14 @@ async def get_risk_summary(request: Request):
                 if prices.empty:
                     continue
                     
-                analyzer = VolatilityAnalyzer(prices)
+                vol_state = get_volatility_state(zone, prices)
                 returns = prices.pct_change().replace([np.inf, -np.inf], np.nan).dropna()
-                var_calc = VaRCalculator(returns)
+                tracker = get_var_tracker(f'{zone}:30')
+                tracker.sync(returns)
+                var_calc = VaRCalculator(returns, tracker=tracker)
                 
                 var_95 = var_calc.historical_var(0.95, 1000000)
-                vol = analyzer.get_summary().get('current_ewma')
+                vol = vol_state.ewma_volatility()
                 if vol is not None and (np.isnan(vol) or np.isinf(vol)):
                     vol = None
                 
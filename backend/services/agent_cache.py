@@ -0,0 +1,222 @@
+"""Shared cache for the reference data chat agents read on every turn."""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from backend.services.query_batch import execute_batch
+
+
+MODEL_REGISTRY_TABLE = 'POWER_UTILITIES_DB.ML.MODEL_REGISTRY'
+HIDDEN_PATTERN_TABLE = 'POWER_UTILITIES_DB.ML.HIDDEN_PATTERN'
+LOAD_ZONE_TABLE = 'POWER_UTILITIES_DB.ATOMIC.LOAD_ZONE'
+PRICE_ANOMALY_TABLE = 'POWER_UTILITIES_DB.ATOMIC.PRICE_ANOMALY_EVENT'
+
+# Zones and the registry change a few times a day; the anomaly count also
+# moves as the 7-day window rolls, so the price agent refreshes sooner.
+AGENT_CACHE_TTL_SECONDS = {
+    'load': 3600,
+    'price': 900,
+}
+DEFAULT_AGENT_CACHE_TTL_SECONDS = 900
+
+# Tables whose commit time is polled, at most once per interval, to drop
+# dependent entries as soon as the table changes rather than at TTL expiry.
+WATCHED_TABLES = [MODEL_REGISTRY_TABLE, HIDDEN_PATTERN_TABLE]
+CHANGE_PROBE_SECONDS = 60
+
+
+class AgentDataCache:
+    """
+    Entries are keyed by (agent, key) and record the tables they were read
+    from, so a change to one table invalidates only the entries built on it.
+    Agents may run in worker threads during fan-out, hence the lock; warehouse
+    calls run outside it.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] = AGENT_CACHE_TTL_SECONDS,
+        watched_tables: Iterable[str] = WATCHED_TABLES,
+        probe_interval: float = CHANGE_PROBE_SECONDS
+    ):
+        self.ttls = dict(ttls)
+        self.watched_tables = list(watched_tables)
+        self.probe_interval = probe_interval
+        self.entries: Dict[Tuple[str, str], Dict] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.change_tokens: Dict[str, str] = {}
+        self.probed_at: Optional[float] = None
+        self.probe_queries = 0
+        self.lock = threading.Lock()
+
+    def _count(self, agent: str, name: str, n: int = 1):
+        counters = self.counters.setdefault(agent, {'hits': 0, 'misses': 0, 'invalidations': 0})
+        counters[name] += n
+
+    def _fresh(self, agent: str, key: str, ttl: float, now: float) -> Optional[Dict]:
+        entry = self.entries.get((agent, key))
+        return entry if entry is not None and now - entry['loaded_at'] < ttl else None
+
+    def _store(self, agent: str, datasets: Dict, results: Dict[str, list], now: float) -> Dict:
+        values = {}
+        with self.lock:
+            for key, rows in results.items():
+                statement, parse, tables = datasets[key]
+                values[key] = parse(rows)
+                self.entries[(agent, key)] = {
+                    'value': values[key], 'loaded_at': now, 'tables': {t.upper() for t in tables}
+                }
+        return values
+
+    def get_many(
+        self,
+        conn,
+        agent: str,
+        datasets: Dict[str, Tuple[str, Callable, Iterable[str]]],
+        ttl: Optional[float] = None
+    ) -> Dict:
+        """
+        Values for several (statement, parse, tables) datasets of one agent.
+        Hits come from the cache; all misses, plus the change probe when one
+        is due, are fetched together in one execute_batch request and
+        ``parse(rows)`` builds each value. Only a probe that reports a change
+        under a value just served costs a second request, to re-read it.
+        """
+        ttl = self.ttls.get(agent, DEFAULT_AGENT_CACHE_TTL_SECONDS) if ttl is None else ttl
+        now = time.time()
+        values, missing = {}, []
+        with self.lock:
+            for key in datasets:
+                entry = self._fresh(agent, key, ttl, now)
+                if entry is not None:
+                    self._count(agent, 'hits')
+                    values[key] = entry['value']
+                else:
+                    self._count(agent, 'misses')
+                    missing.append(key)
+
+        probe = self._claim_probe(now)
+        statements = [datasets[key][0] for key in missing]
+        if probe:
+            try:
+                results = execute_batch(conn, [self._probe_statement()] + statements)
+            except Exception as e:
+                # The probe must not cost the turn its data; retry without it.
+                print(f"Error probing agent cache tables: {e}")
+                probe = False
+                results = execute_batch(conn, statements) if statements else []
+        else:
+            results = execute_batch(conn, statements) if statements else []
+
+        changed = []
+        if probe:
+            self.probe_queries += 1
+            probe_rows = results.pop(0)
+            changed = self._apply_probe(probe_rows[0])
+        values.update(self._store(agent, datasets, dict(zip(missing, results)), now))
+
+        stale = [
+            key for key in datasets
+            if key not in missing and {t.upper() for t in datasets[key][2]} & set(changed)
+        ]
+        if stale:
+            results = execute_batch(conn, [datasets[key][0] for key in stale])
+            values.update(self._store(agent, datasets, dict(zip(stale, results)), now))
+        return values
+
+    def invalidate(self, table: Optional[str] = None, agent: Optional[str] = None) -> int:
+        """Drop entries read from ``table`` and/or owned by ``agent``; everything if neither is given."""
+        with self.lock:
+            dropped = [
+                k for k, entry in self.entries.items()
+                if (table is None or table.upper() in entry['tables'])
+                and (agent is None or k[0] == agent)
+            ]
+            for k in dropped:
+                del self.entries[k]
+                self._count(k[0], 'invalidations')
+        return len(dropped)
+
+    def _claim_probe(self, now: float, force: bool = False) -> bool:
+        """True if a probe is due; the caller that gets True runs it."""
+        if not self.watched_tables:
+            return False
+        with self.lock:
+            if not force and self.probed_at is not None and now - self.probed_at < self.probe_interval:
+                return False
+            self.probed_at = now
+            return True
+
+    def _probe_statement(self) -> str:
+        columns = ', '.join(f"SYSTEM$LAST_CHANGE_COMMIT_TIME('{t}')" for t in self.watched_tables)
+        return f"SELECT {columns}"
+
+    def _apply_probe(self, row) -> list:
+        """Record the probed commit times and invalidate dependants of the tables that moved."""
+        changed = []
+        for table, token in zip(self.watched_tables, row):
+            token = str(token)
+            previous = self.change_tokens.get(table)
+            self.change_tokens[table] = token
+            if previous is not None and previous != token:
+                changed.append(table.upper())
+                self.invalidate(table=table)
+        return changed
+
+    def check_for_changes(self, conn, force: bool = False) -> list:
+        """
+        Compare each watched table's last commit time with the one seen on the
+        previous probe and invalidate dependants of the tables that moved.
+        get_many folds this probe into its own batch; this standalone form
+        serves the invalidation hook. Failures leave the TTLs as the only expiry.
+        """
+        if not self._claim_probe(time.time(), force):
+            return []
+        try:
+            row = execute_batch(conn, [self._probe_statement()])[0][0]
+            self.probe_queries += 1
+        except Exception as e:
+            print(f"Error probing agent cache tables: {e}")
+            return []
+        return self._apply_probe(row)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self.lock:
+            agents = {}
+            for agent, counters in self.counters.items():
+                lookups = counters['hits'] + counters['misses']
+                agents[agent] = {
+                    **counters,
+                    'hit_rate': counters['hits'] / lookups if lookups else None,
+                    'entries': sum(1 for k in self.entries if k[0] == agent),
+                    'ttl_seconds': self.ttls.get(agent, DEFAULT_AGENT_CACHE_TTL_SECONDS),
+                }
+            entries = [
+                {
+                    'agent': k[0],
+                    'key': k[1],
+                    'age_seconds': round(now - entry['loaded_at'], 1),
+                    'tables': sorted(entry['tables']),
+                }
+                for k, entry in self.entries.items()
+            ]
+        return {
+            'agents': agents,
+            'entries': entries,
+            'watched_tables': self.watched_tables,
+            'probe_interval_seconds': self.probe_interval,
+            'probe_queries': self.probe_queries,
+            'last_probe_age_seconds': round(now - self.probed_at, 1) if self.probed_at else None,
+        }
+
+
+_agent_cache: Optional[AgentDataCache] = None
+
+
+def get_agent_cache() -> AgentDataCache:
+    global _agent_cache
+    if _agent_cache is None:
+        _agent_cache = AgentDataCache()
+    return _agent_cache
@@ -0,0 +1,167 @@
+"""
+Backfill and incremental refresh of ML.FEATURE_STORE_HOURLY. Both run
+offline, not in the API process: python -m backend.services.feature_store
+--start ... for a backfill, or --refresh from a scheduled job.
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+from backend.models.physics_features import (
+    FEATURE_STORE_COLUMNS, HISTORY_HOURS, PhysicsFeaturePipeline
+)
+
+
+FEATURE_TABLE = 'POWER_UTILITIES_DB.ML.FEATURE_STORE_HOURLY'
+STAGE_TABLE = 'POWER_UTILITIES_DB.ML.FEATURE_STORE_HOURLY_STAGE'
+
+# Stored columns the pipeline does not compute (it emits NULL for them);
+# a MERGE must not overwrite values loaded by other jobs.
+EXTERNAL_COLUMNS = ['NG_PRICE', 'COAL_PRICE']
+
+
+def fetch_feature_inputs(cursor, start, end) -> pd.DataFrame:
+    """Zone-hour weather (averaged over stations) with zone load and average RT LMP."""
+    cursor.execute(f"""
+        WITH weather AS (
+            SELECT 
+                ZONE_CODE,
+                DATE_TRUNC('hour', DATETIME_UTC) AS DATETIME_UTC,
+                AVG(TEMP_F) AS TEMP_F,
+                AVG(DEW_POINT_F) AS DEW_POINT_F,
+                AVG(WIND_SPEED_MPH) AS WIND_SPEED_MPH,
+                AVG(HUMIDITY_PCT) AS HUMIDITY_PCT,
+                AVG(PRECIP_IN) AS PRECIP_IN
+            FROM POWER_UTILITIES_DB.ATOMIC.HOURLY_WEATHER
+            WHERE DATETIME_UTC >= '{start}' AND DATETIME_UTC < '{end}'
+            GROUP BY 1, 2
+        ),
+        lmp AS (
+            SELECT ZONE_CODE, DATE_TRUNC('hour', DATETIME_UTC) AS DATETIME_UTC, AVG(RT_LMP) AS LMP
+            FROM POWER_UTILITIES_DB.ATOMIC.HOURLY_LMP
+            WHERE DATETIME_UTC >= '{start}' AND DATETIME_UTC < '{end}'
+            GROUP BY 1, 2
+        )
+        SELECT 
+            w.ZONE_CODE, w.DATETIME_UTC, w.TEMP_F, w.DEW_POINT_F, w.WIND_SPEED_MPH,
+            w.HUMIDITY_PCT, w.PRECIP_IN, l.LOAD_MW, p.LMP
+        FROM weather w
+        LEFT JOIN POWER_UTILITIES_DB.ATOMIC.HOURLY_LOAD l
+            ON l.ZONE_CODE = w.ZONE_CODE AND l.DATETIME_UTC = w.DATETIME_UTC
+        LEFT JOIN lmp p
+            ON p.ZONE_CODE = w.ZONE_CODE AND p.DATETIME_UTC = w.DATETIME_UTC
+        ORDER BY w.ZONE_CODE, w.DATETIME_UTC
+    """)
+    columns = ['ZONE_CODE', 'DATETIME_UTC', 'TEMP_F', 'DEW_POINT_F', 'WIND_SPEED_MPH',
+               'HUMIDITY_PCT', 'PRECIP_IN', 'LOAD_MW', 'LMP']
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def write_feature_rows(conn, features: pd.DataFrame) -> int:
+    """
+    Upsert rows on (ZONE_CODE, DATETIME_UTC) through a session-scoped stage
+    table. A NULL (NaN) value never overwrites a stored one.
+    """
+    if features.empty:
+        return 0
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGE_TABLE} LIKE {FEATURE_TABLE}")
+    cursor.execute(f"TRUNCATE TABLE {STAGE_TABLE}")
+
+    rows = features[FEATURE_STORE_COLUMNS].astype(object)
+    rows['DATETIME_UTC'] = features['DATETIME_UTC'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    rows = rows.where(pd.notna(rows), None)
+    placeholders = ', '.join(['%s'] * len(FEATURE_STORE_COLUMNS))
+    cursor.executemany(
+        f"INSERT INTO {STAGE_TABLE} ({', '.join(FEATURE_STORE_COLUMNS)}) VALUES ({placeholders})",
+        [tuple(v.item() if isinstance(v, np.generic) else v for v in row)
+         for row in rows.itertuples(index=False, name=None)]
+    )
+
+    updates = ', '.join(
+        f"{c} = COALESCE(s.{c}, t.{c})" for c in FEATURE_STORE_COLUMNS[2:] if c not in EXTERNAL_COLUMNS
+    )
+    cursor.execute(f"""
+        MERGE INTO {FEATURE_TABLE} t
+        USING {STAGE_TABLE} s
+            ON t.ZONE_CODE = s.ZONE_CODE AND t.DATETIME_UTC = s.DATETIME_UTC
+        WHEN MATCHED THEN UPDATE SET {updates}
+        WHEN NOT MATCHED THEN INSERT ({', '.join(FEATURE_STORE_COLUMNS)})
+            VALUES ({', '.join('s.' + c for c in FEATURE_STORE_COLUMNS)})
+    """)
+    return len(features)
+
+
+def backfill_feature_store(conn, start, end, chunk_days: int = 31) -> int:
+    """
+    Rebuild features for [start, end) in chunks through one pipeline, so lags
+    and EWMA state carry across chunk boundaries. The week before ``start``
+    is read only to warm up the lag and rolling windows.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    pipeline = PhysicsFeaturePipeline()
+    warmup = start - pd.Timedelta(hours=HISTORY_HOURS)
+    pipeline.append(fetch_feature_inputs(conn.cursor(), warmup, start))
+
+    written = 0
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + pd.Timedelta(days=chunk_days), end)
+        features = pipeline.append(fetch_feature_inputs(conn.cursor(), chunk_start, chunk_end))
+        written += write_feature_rows(conn, features)
+        chunk_start = chunk_end
+    return written
+
+
+_pipeline: Optional[PhysicsFeaturePipeline] = None
+
+
+def refresh_feature_store(conn, lookback_hours: int = HISTORY_HOURS) -> int:
+    """
+    Append hours newer than the last processed hour. The first call in a
+    process rewrites the last ``lookback_hours``, reading the week before
+    them only to warm up the lag and rolling windows.
+    """
+    global _pipeline
+    now = pd.Timestamp.utcnow().tz_localize(None).floor('h') + pd.Timedelta(hours=1)
+    if _pipeline is None:
+        _pipeline = PhysicsFeaturePipeline()
+        since = now - pd.Timedelta(hours=lookback_hours)
+        features = _pipeline.append(
+            fetch_feature_inputs(conn.cursor(), since - pd.Timedelta(hours=HISTORY_HOURS), now)
+        )
+        # Warm-up rows lack a full history window; never write them.
+        features = features[features['DATETIME_UTC'] >= since]
+    else:
+        since = _pipeline.last_timestamp + pd.Timedelta(hours=1)
+        features = _pipeline.append(fetch_feature_inputs(conn.cursor(), since, now))
+    return write_feature_rows(conn, features)
+
+
+if __name__ == '__main__':
+    from backend.main import get_snowflake_connection
+
+    parser = argparse.ArgumentParser(description='Backfill or refresh ML.FEATURE_STORE_HOURLY')
+    parser.add_argument('--start')
+    parser.add_argument('--end', default=str(pd.Timestamp.utcnow().tz_localize(None).floor('h')))
+    parser.add_argument('--chunk-days', type=int, default=31)
+    parser.add_argument('--refresh', action='store_true', help='Rewrite only the last --lookback-hours')
+    parser.add_argument('--lookback-hours', type=int, default=HISTORY_HOURS)
+    args = parser.parse_args()
+    if not args.refresh and args.start is None:
+        parser.error('--start is required unless --refresh is given')
+
+    conn = get_snowflake_connection()
+    try:
+        if args.refresh:
+            count = refresh_feature_store(conn, args.lookback_hours)
+        else:
+            count = backfill_feature_store(conn, args.start, args.end, args.chunk_days)
+    finally:
+        conn.close()
+    if args.refresh:
+        print(f"Wrote {count} feature rows for the last {args.lookback_hours} hours")
+    else:
+        print(f"Wrote {count} feature rows for {args.start} to {args.end}")
@@ -0,0 +1,67 @@
+"""Offline builder for the 4CP table and season model: python -m backend.services.fourcp_history."""
+
+import argparse
+import os
+import pandas as pd
+
+from backend.models.fourcp_table import FOURCP_TABLE_MONTHS, FourCPTable, fourcp_table_path
+from backend.models.fourcp_season import FourCPSeasonModel
+
+
+def fetch_fourcp_history(cursor, years: int = 6) -> pd.DataFrame:
+    """Hourly system load and average temperature for the 4CP months, in one scan of each source."""
+    months = ', '.join(str(m) for m in FOURCP_TABLE_MONTHS)
+    cursor.execute(f"""
+        WITH load AS (
+            SELECT d.DATETIME, SUM(d.RTLOAD) AS LOAD_MW
+            FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_LOADS d
+            WHERE d.DATETIME >= DATEADD('year', -{years}, CURRENT_DATE())
+              AND MONTH(d.DATETIME) IN ({months})
+            GROUP BY d.DATETIME
+        ),
+        weather AS (
+            SELECT w.DATETIME, AVG(w.TEMP_F) AS TEMP_F
+            FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.ALL_WEATHER_MV w
+            WHERE w.DATETIME >= DATEADD('year', -{years}, CURRENT_DATE())
+              AND MONTH(w.DATETIME) IN ({months})
+            GROUP BY w.DATETIME
+        )
+        SELECT load.DATETIME, load.LOAD_MW, weather.TEMP_F
+        FROM load
+        JOIN weather ON weather.DATETIME = load.DATETIME
+        ORDER BY load.DATETIME
+    """)
+    df = pd.DataFrame(cursor.fetchall(), columns=['DATETIME', 'LOAD_MW', 'TEMP_F'])
+    df['DATETIME'] = pd.to_datetime(df['DATETIME'])
+    for col in ['LOAD_MW', 'TEMP_F']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def build_fourcp_table(conn, years: int = 6, path: str = None) -> FourCPTable:
+    path = path or fourcp_table_path()
+    history = fetch_fourcp_history(conn.cursor(), years)
+    table = FourCPTable.from_history(history)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table.save(path)
+    # The season simulator's weather/load model is fitted from the same scan.
+    FourCPSeasonModel.from_history(history).save(os.path.splitext(path)[0] + '_season.json')
+    return table
+
+
+if __name__ == '__main__':
+    from backend.main import get_snowflake_connection
+
+    parser = argparse.ArgumentParser(description='Build the empirical 4CP probability table')
+    parser.add_argument('--years', type=int, default=6)
+    parser.add_argument('--out', default=None, help='Output .npy path (default: FOURCP_TABLE_PATH)')
+    args = parser.parse_args()
+
+    conn = get_snowflake_connection()
+    try:
+        table = build_fourcp_table(conn, args.years, args.out)
+    finally:
+        conn.close()
+    meta = table.metadata
+    print(f"Built 4CP table from {meta['hours']} hours ({meta['start']} to {meta['end']}), "
+          f"{meta['events']} 4CP intervals -> {args.out or fourcp_table_path()}")
@@ -0,0 +1,101 @@
+"""Zone price statistics computed in the warehouse and cached per zone."""
+
+import time
+from typing import Dict, Optional, Tuple
+
+
+PRICE_STATS_TTL_SECONDS = 900
+# A failed fetch with nothing cached is retried after this long rather than
+# serving the default statistics for a full TTL.
+PRICE_STATS_RETRY_SECONDS = 30
+DEFAULT_BASE_PRICE = 50.0
+
+_price_stats_cache: Dict[Tuple[str, int], Dict] = {}
+
+
+def fetch_zone_price_stats(cursor, zone: str = 'LZ_HOUSTON', days: int = 365) -> Dict:
+    """One-row aggregate over the same rows get_price_data would return."""
+    cursor.execute(f"""
+        SELECT 
+            COUNT(*) AS N,
+            AVG(d.RTLMP) AS MEAN_PRICE,
+            STDDEV(d.RTLMP) AS STD_PRICE,
+            MIN(d.RTLMP) AS MIN_PRICE,
+            MAX(d.RTLMP) AS MAX_PRICE,
+            PERCENTILE_CONT(0.05) WITHIN GROUP (ORDER BY d.RTLMP) AS P05,
+            PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY d.RTLMP) AS P25,
+            PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY d.RTLMP) AS P50,
+            PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY d.RTLMP) AS P75,
+            PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY d.RTLMP) AS P95,
+            MAX(d.DATETIME) AS LAST_DATETIME
+        FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_PRICES d
+        JOIN YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DS_OBJECT_LIST o 
+            ON d.OBJECTID = o.OBJECTID
+        WHERE o.OBJECTNAME = '{zone}'
+          AND d.DATETIME >= DATEADD('day', -{days}, CURRENT_DATE())
+          AND d.RTLMP > 0
+    """)
+    row = cursor.fetchone()
+    columns = ['count', 'mean', 'std', 'min', 'max', 'p05', 'p25', 'p50', 'p75', 'p95']
+    stats = {
+        name: (float(value) if value is not None else None)
+        for name, value in zip(columns, row[:10])
+    }
+    stats['count'] = int(stats['count'] or 0)
+    stats['last_datetime'] = str(row[10]) if row[10] is not None else None
+    return stats
+
+
+def get_zone_price_stats(
+    cursor,
+    zone: str = 'LZ_HOUSTON',
+    days: int = 365,
+    max_age: float = PRICE_STATS_TTL_SECONDS
+) -> Dict:
+    key = (zone, days)
+    cached = _price_stats_cache.get(key)
+    now = time.time()
+    if cached is not None and now - cached['refreshed_at'] < min(max_age, cached.get('ttl', max_age)):
+        return cached
+
+    fallback = False
+    try:
+        stats = fetch_zone_price_stats(cursor, zone, days)
+    except Exception as e:
+        print(f"Error fetching price statistics: {e}")
+        if cached is not None:
+            return cached
+        stats = {'count': 0, 'mean': None, 'last_datetime': None}
+        fallback = True
+
+    stats.update({
+        'zone': zone,
+        'days': days,
+        'refreshed_at': now,
+        'base_price': stats['mean'] if stats['count'] else DEFAULT_BASE_PRICE,
+        'base_price_source': 'historical' if stats['count'] else ('unavailable' if fallback else 'default'),
+        # Changes whenever new hours land or history is restated.
+        'version': f"{stats['count']}:{stats['last_datetime']}:{stats['mean']}",
+        'fetch_failed': fallback,
+        'ttl': PRICE_STATS_RETRY_SECONDS if fallback else max_age,
+    })
+    _price_stats_cache[key] = stats
+    return stats
+
+
+def peek_zone_price_stats(
+    zone: str = 'LZ_HOUSTON',
+    days: int = 365,
+    max_age: float = PRICE_STATS_TTL_SECONDS
+) -> Optional[Dict]:
+    """The cached statistics if they are still fresh, without touching the warehouse."""
+    cached = _price_stats_cache.get((zone, days))
+    if cached is not None and time.time() - cached['refreshed_at'] < min(max_age, cached.get('ttl', max_age)):
+        return cached
+    return None
+
+
+def invalidate_zone_price_stats(zone: Optional[str] = None):
+    for key in list(_price_stats_cache):
+        if zone is None or key[0] == zone:
+            del _price_stats_cache[key]
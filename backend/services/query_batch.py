@@ -0,0 +1,59 @@
+"""Run several warehouse statements as one multi-statement request."""
+
+from typing import List
+
+
+# Cleared once the connector or account is found not to accept
+# multi-statement requests, so later batches go straight to sequential
+# execution. Any other failure propagates and leaves this untouched.
+_multi_statement_supported = True
+
+
+def _execute_sequential(conn, statements: List[str]) -> List[list]:
+    cursor = conn.cursor()
+    results = []
+    for statement in statements:
+        cursor.execute(statement)
+        results.append(cursor.fetchall())
+    return results
+
+
+def _multi_statement_unsupported(error: Exception) -> bool:
+    """True for a connector without num_statements or an account rejecting MULTI_STATEMENT_COUNT."""
+    message = str(error).lower()
+    if isinstance(error, TypeError):
+        return 'num_statements' in message
+    return 'statement count' in message or 'multi_statement_count' in message
+
+
+def execute_batch(conn, statements: List[str]) -> List[list]:
+    """
+    Rows for each statement, in order. The statements are sent as one
+    multi-statement request and the result sets read back with nextset();
+    the connector may still fetch each result set separately, so this saves
+    per-statement submissions rather than guaranteeing a single round trip.
+    Without multi-statement support the statements run one by one.
+    """
+    global _multi_statement_supported
+    if len(statements) <= 1 or not _multi_statement_supported:
+        return _execute_sequential(conn, statements)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            ';\n'.join(statement.strip().rstrip(';') for statement in statements),
+            num_statements=len(statements)
+        )
+    except Exception as e:
+        if not _multi_statement_unsupported(e):
+            raise
+        print(f"Multi-statement requests are not supported, running statements one by one: {e}")
+        _multi_statement_supported = False
+        return _execute_sequential(conn, statements)
+
+    results = [cursor.fetchall()]
+    while len(results) < len(statements) and cursor.nextset():
+        results.append(cursor.fetchall())
+    if len(results) != len(statements):
+        raise RuntimeError(f"Batch returned {len(results)} result sets for {len(statements)} statements")
+    return results
@@ -0,0 +1,199 @@
+"""Custom dispatch scenarios persisted in the warehouse with per-zone impacts."""
+
+import re
+from typing import Dict, List, Optional
+
+from backend.services.price_stats import get_zone_price_stats, peek_zone_price_stats
+
+
+SCENARIO_TABLE = 'POWER_UTILITIES_DB.ML.DISPATCH_SCENARIO'
+IMPACT_TABLE = 'POWER_UTILITIES_DB.ML.DISPATCH_SCENARIO_IMPACT'
+
+# Price-stats version last merged into IMPACT_TABLE by this worker, per zone,
+# so repeated requests under unchanged statistics skip the MERGE.
+_merged_versions: Dict[str, str] = {}
+
+
+def scenario_key(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')[:100] or 'custom'
+
+
+def save_scenario(
+    cursor,
+    name: str,
+    price_level: float,
+    duration_hours: int,
+    description: str = ''
+) -> Dict:
+    key = scenario_key(name)
+    description = description or f'Price spike to ${price_level}/MWh for {duration_hours} hours'
+    params = {
+        'key': key,
+        'name': name,
+        'price_level': float(price_level),
+        'duration_hours': int(duration_hours),
+        'description': description,
+    }
+    cursor.execute(f"""
+        MERGE INTO {SCENARIO_TABLE} t
+        USING (SELECT %(key)s AS SCENARIO_KEY) s
+            ON t.SCENARIO_KEY = s.SCENARIO_KEY
+        WHEN MATCHED THEN UPDATE SET
+            SCENARIO_NAME = %(name)s,
+            PRICE_LEVEL = %(price_level)s,
+            DURATION_HOURS = %(duration_hours)s,
+            DESCRIPTION = %(description)s,
+            UPDATED_AT = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT
+            (SCENARIO_KEY, SCENARIO_NAME, PRICE_LEVEL, DURATION_HOURS, DESCRIPTION)
+            VALUES (%(key)s, %(name)s, %(price_level)s, %(duration_hours)s, %(description)s)
+    """, params)
+    # A redefined scenario invalidates its impacts in every zone.
+    cursor.execute(f"DELETE FROM {IMPACT_TABLE} WHERE SCENARIO_KEY = %(key)s", params)
+    _merged_versions.clear()
+    return {
+        'key': key,
+        'name': name,
+        'type': 'saved',
+        'price_level': float(price_level),
+        'duration_hours': int(duration_hours),
+        'description': description,
+    }
+
+
+def delete_scenario(cursor, key: str) -> bool:
+    cursor.execute(f"DELETE FROM {IMPACT_TABLE} WHERE SCENARIO_KEY = %(key)s", {'key': key})
+    cursor.execute(f"DELETE FROM {SCENARIO_TABLE} WHERE SCENARIO_KEY = %(key)s", {'key': key})
+    return cursor.rowcount > 0
+
+
+def load_scenarios(cursor) -> List[Dict]:
+    try:
+        cursor.execute(f"""
+            SELECT SCENARIO_KEY, SCENARIO_NAME, PRICE_LEVEL, DURATION_HOURS, DESCRIPTION
+            FROM {SCENARIO_TABLE}
+            ORDER BY SCENARIO_KEY
+        """)
+        rows = cursor.fetchall()
+    except Exception as e:
+        print(f"Error loading saved scenarios: {e}")
+        return []
+    return [
+        {
+            'key': key,
+            'name': name,
+            'type': 'saved',
+            'price_level': float(price_level),
+            'duration_hours': int(duration),
+            'description': description or '',
+        }
+        for key, name, price_level, duration, description in rows
+    ]
+
+
+def merge_zone_impacts(cursor, zone: str, price_stats: Dict, force: bool = False):
+    """Recompute impacts for ``zone`` in one statement, touching only rows whose version is stale."""
+    if price_stats.get('fetch_failed'):
+        # Never persist impacts computed from the outage placeholder.
+        return
+    version = price_stats['version']
+    if not force and _merged_versions.get(zone) == version:
+        return
+    cursor.execute(f"""
+        MERGE INTO {IMPACT_TABLE} t
+        USING (
+            SELECT 
+                SCENARIO_KEY,
+                PRICE_LEVEL - %(base_price)s AS SAVINGS_PER_MWH
+            FROM {SCENARIO_TABLE}
+        ) s
+            ON t.SCENARIO_KEY = s.SCENARIO_KEY AND t.ZONE_CODE = %(zone)s
+        WHEN MATCHED AND t.PRICE_STATS_VERSION <> %(version)s THEN UPDATE SET
+            PRICE_STATS_VERSION = %(version)s,
+            BASE_PRICE = %(base_price)s,
+            BASE_PRICE_SOURCE = %(source)s,
+            SAVINGS_PER_MWH = s.SAVINGS_PER_MWH,
+            COMPUTED_AT = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT
+            (SCENARIO_KEY, ZONE_CODE, PRICE_STATS_VERSION, BASE_PRICE, BASE_PRICE_SOURCE, SAVINGS_PER_MWH)
+            VALUES (s.SCENARIO_KEY, %(zone)s, %(version)s, %(base_price)s, %(source)s, s.SAVINGS_PER_MWH)
+    """, {
+        'zone': zone,
+        'version': version,
+        'base_price': float(price_stats['base_price']),
+        'source': price_stats['base_price_source'],
+    })
+    _merged_versions[zone] = version
+
+
+def _fetch_impacts(cursor, zone: str, key: Optional[str] = None) -> List[tuple]:
+    key_filter = "AND s.SCENARIO_KEY = %(key)s" if key is not None else ""
+    cursor.execute(f"""
+        SELECT 
+            s.SCENARIO_KEY, s.SCENARIO_NAME, s.PRICE_LEVEL, s.DURATION_HOURS, s.DESCRIPTION,
+            i.PRICE_STATS_VERSION, i.BASE_PRICE, i.BASE_PRICE_SOURCE, i.SAVINGS_PER_MWH
+        FROM {SCENARIO_TABLE} s
+        LEFT JOIN {IMPACT_TABLE} i
+            ON i.SCENARIO_KEY = s.SCENARIO_KEY AND i.ZONE_CODE = %(zone)s
+        WHERE 1 = 1 {key_filter}
+        ORDER BY s.SCENARIO_KEY
+    """, {'zone': zone, 'key': key})
+    return cursor.fetchall()
+
+
+def get_saved_impacts(
+    cursor,
+    zone: str,
+    capacity_mw: float,
+    key: Optional[str] = None,
+    days: int = 365
+) -> List[Dict]:
+    """
+    Impacts of saved scenarios read from IMPACT_TABLE. Prices are only
+    fetched when a scenario has no impact for the zone yet; a version that
+    differs from this worker's cached statistics is rewritten from that cache.
+    When the rewrite is skipped (price fetch failed), a scenario without a
+    stored impact is priced in memory against the fetched base price and
+    marked ``impact_status='missing'``; an outdated one is served as
+    ``'stale'``.
+    """
+    rows = _fetch_impacts(cursor, zone, key)
+    price_stats = peek_zone_price_stats(zone, days)
+    if any(
+        r[5] is None or r[6] is None or r[8] is None
+        or (price_stats is not None and r[5] != price_stats['version'])
+        for r in rows
+    ):
+        if price_stats is None:
+            price_stats = get_zone_price_stats(cursor, zone, days)
+        # Forced: another worker may have saved scenarios since our last merge.
+        merge_zone_impacts(cursor, zone, price_stats, force=True)
+        rows = _fetch_impacts(cursor, zone, key)
+
+    results = []
+    for key, name, price_level, duration, description, version, base_price, source, per_mwh in rows:
+        duration = int(duration)
+        if per_mwh is None or base_price is None:
+            status = 'missing'
+            base_price = price_stats['base_price']
+            source = price_stats['base_price_source']
+            per_mwh = float(price_level) - float(base_price)
+        else:
+            status = 'stale' if price_stats is not None and version != price_stats['version'] else 'current'
+            per_mwh = float(per_mwh)
+        results.append({
+            'scenario_key': key,
+            'scenario': name,
+            'description': description or '',
+            'type': 'saved',
+            'base_price': float(base_price),
+            'base_price_source': source,
+            'impact_status': status,
+            'stress_price': float(price_level),
+            'duration_hours': duration,
+            'capacity_mw': capacity_mw,
+            'savings_per_mwh': per_mwh,
+            'total_savings': per_mwh * capacity_mw * duration,
+            'total_mwh': capacity_mw * duration,
+        })
+    return results
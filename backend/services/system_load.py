@@ -0,0 +1,202 @@
+"""Hourly ERCOT system load index kept current by incremental background refreshes."""
+
+import asyncio
+import threading
+import time
+import pandas as pd
+from typing import Dict, NamedTuple, Optional
+
+
+SYSTEM_LOAD_TTL_SECONDS = 900
+SYSTEM_LOAD_HISTORY_MONTHS = 6
+
+
+class SystemLoadSnapshot(NamedTuple):
+    hourly: pd.Series
+    daily_peaks: pd.Series
+    daily_peak_times: pd.Series
+    monthly_max: Dict[pd.Period, Dict]
+
+
+class SystemLoadIndex:
+    """
+    Hourly system totals (sum of RTLOAD over load objects) for the current
+    month and the SYSTEM_LOAD_HISTORY_MONTHS before it, with per-month maxima
+    and daily peaks.
+    A refresh only fetches hours at or after the last indexed hour, which is
+    re-read because its total may have been partial.
+    
+    Refreshes run on a worker thread while routes read, so every structure
+    is rebuilt locally and published in one assignment to ``snapshot``;
+    readers take ``snapshot`` once and use only that.
+    """
+
+    def __init__(self, history_months: int = SYSTEM_LOAD_HISTORY_MONTHS):
+        self.history_months = history_months
+        self.snapshot = SystemLoadSnapshot(
+            hourly=pd.Series(dtype=float, index=pd.DatetimeIndex([])),
+            daily_peaks=pd.Series(dtype=float, index=pd.DatetimeIndex([])),
+            daily_peak_times=pd.Series(dtype='datetime64[ns]', index=pd.DatetimeIndex([])),
+            monthly_max={},
+        )
+        self.refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def is_built(self) -> bool:
+        return self.refreshed_at is not None
+
+    @property
+    def hourly(self) -> pd.Series:
+        return self.snapshot.hourly
+
+    @property
+    def daily_peaks(self) -> pd.Series:
+        return self.snapshot.daily_peaks
+
+    @property
+    def monthly_max(self) -> Dict[pd.Period, Dict]:
+        return self.snapshot.monthly_max
+
+    @property
+    def last_datetime(self) -> Optional[pd.Timestamp]:
+        hourly = self.snapshot.hourly
+        return hourly.index[-1] if len(hourly) else None
+
+    def is_stale(self, max_age: float = SYSTEM_LOAD_TTL_SECONDS) -> bool:
+        return self.refreshed_at is None or time.time() - self.refreshed_at >= max_age
+
+    def fetch(self, cursor) -> pd.Series:
+        if self.last_datetime is not None:
+            since = f"'{self.last_datetime}'"
+        else:
+            since = f"DATEADD('month', -{self.history_months}, DATE_TRUNC('month', CURRENT_DATE()))"
+        cursor.execute(f"""
+            SELECT d.DATETIME, SUM(d.RTLOAD) as TOTAL_LOAD_MW
+            FROM YES_ENERGY_FOUNDATION_DATA.FOUNDATION.DART_LOADS d
+            WHERE d.DATETIME >= {since}
+            GROUP BY d.DATETIME
+            ORDER BY d.DATETIME
+        """)
+        rows = cursor.fetchall()
+        if not rows:
+            return pd.Series(dtype=float)
+        df = pd.DataFrame(rows, columns=['DATETIME', 'TOTAL_LOAD_MW'])
+        return pd.Series(
+            pd.to_numeric(df['TOTAL_LOAD_MW'], errors='coerce').values,
+            index=pd.to_datetime(df['DATETIME'])
+        ).dropna()
+
+    def update(self, new_hours: pd.Series):
+        """Merge fetched hours (newer values win) and refresh the aggregates they touch."""
+        if len(new_hours):
+            current = self.snapshot
+            hourly = new_hours if not len(current.hourly) else pd.concat(
+                [current.hourly[current.hourly.index < new_hours.index[0]], new_hours]
+            )
+            hourly = hourly[~hourly.index.duplicated(keep='last')].sort_index()
+            # Trim on a month boundary so retained months are always complete.
+            first_month = hourly.index[-1].to_period('M') - self.history_months
+            cutoff = first_month.start_time
+            hourly = hourly[hourly.index >= cutoff]
+
+            touched_days = new_hours.index.normalize().unique()
+            recent = hourly[hourly.index >= touched_days.min()]
+            by_day = recent.groupby(recent.index.normalize())
+            daily_peaks = pd.concat([
+                current.daily_peaks[current.daily_peaks.index < touched_days.min()], by_day.max()
+            ])
+            daily_peak_times = pd.concat([
+                current.daily_peak_times[current.daily_peak_times.index < touched_days.min()],
+                by_day.idxmax()
+            ])
+            daily_peaks = daily_peaks[daily_peaks.index >= cutoff]
+            daily_peak_times = daily_peak_times[daily_peak_times.index >= cutoff]
+
+            monthly_max = dict(current.monthly_max)
+            for month in new_hours.index.to_period('M').unique():
+                if month < first_month:
+                    continue
+                in_month = daily_peaks[daily_peaks.index.to_period('M') == month]
+                day = in_month.idxmax()
+                monthly_max[month] = {
+                    'load_mw': float(in_month[day]),
+                    'datetime': daily_peak_times[day],
+                }
+            for month in [m for m in monthly_max if m < first_month]:
+                del monthly_max[month]
+            self.snapshot = SystemLoadSnapshot(hourly, daily_peaks, daily_peak_times, monthly_max)
+        self.refreshed_at = time.time()
+
+    def refresh(self, conn):
+        try:
+            with self._lock:
+                self.update(self.fetch(conn.cursor()))
+        except Exception as e:
+            print(f"Error refreshing system load index: {e}")
+        finally:
+            self._refreshing = False
+
+    def schedule_refresh(self, conn) -> bool:
+        """Start a background refresh if stale and none is running; never blocks."""
+        if self._refreshing or not self.is_stale():
+            return False
+        self._refreshing = True
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self.refresh, conn)
+        except RuntimeError:
+            threading.Thread(target=self.refresh, args=(conn,), daemon=True).start()
+        return True
+
+    def month_to_date(
+        self,
+        month: Optional[pd.Period] = None,
+        top_n: int = 5,
+        snapshot: Optional[SystemLoadSnapshot] = None
+    ) -> Optional[Dict]:
+        snapshot = snapshot or self.snapshot
+        if not len(snapshot.daily_peaks):
+            return None
+        month = month or snapshot.daily_peaks.index[-1].to_period('M')
+        if month not in snapshot.monthly_max:
+            return None
+        in_month = snapshot.daily_peaks[snapshot.daily_peaks.index.to_period('M') == month]
+        top_days = in_month.nlargest(top_n)
+        return {
+            'month': str(month),
+            'peak_load_mw': snapshot.monthly_max[month]['load_mw'],
+            'peak_datetime': str(snapshot.monthly_max[month]['datetime']),
+            'top_daily_peaks': [
+                {'datetime': str(snapshot.daily_peak_times[day]), 'load_mw': float(load)}
+                for day, load in top_days.items()
+            ]
+        }
+
+    def compare(self, load_mw: float) -> Optional[Dict]:
+        snapshot = self.snapshot
+        if not self.is_built or not len(snapshot.hourly):
+            return None
+        current_month = self.month_to_date(snapshot=snapshot)
+        month_peak = current_month['peak_load_mw'] if current_month else None
+        return {
+            'as_of': str(snapshot.hourly.index[-1]),
+            'latest_system_load_mw': float(snapshot.hourly.iloc[-1]),
+            'month_to_date': current_month,
+            'vs_month_peak': load_mw / month_peak if month_peak else None,
+            'exceeds_month_peak': bool(load_mw > month_peak) if month_peak else None,
+            'monthly_maxima': [
+                {'month': str(month), 'load_mw': peak['load_mw'], 'datetime': str(peak['datetime'])}
+                for month, peak in sorted(snapshot.monthly_max.items())
+            ]
+        }
+
+
+_system_load_index = SystemLoadIndex()
+
+
+def get_system_load_index(conn=None) -> SystemLoadIndex:
+    """The shared index; passing ``conn`` schedules a background refresh when stale."""
+    if conn is not None:
+        _system_load_index.schedule_refresh(conn)
+    return _system_load_index
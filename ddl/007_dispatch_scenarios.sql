@@ -0,0 +1,41 @@
+-- ============================================================================
+-- POWER & UTILITIES INTELLIGENCE PLATFORM - Dispatch Scenario Registry
+-- ============================================================================
+-- Saved custom stress scenarios shared by every backend worker, plus their
+-- precomputed per-zone impacts keyed by the base-price statistics version
+-- ============================================================================
+
+USE DATABASE POWER_UTILITIES_DB;
+USE SCHEMA ML;
+
+-- ============================================================================
+-- CUSTOM SCENARIOS
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS DISPATCH_SCENARIO (
+    SCENARIO_KEY VARCHAR(100) PRIMARY KEY,
+    SCENARIO_NAME VARCHAR(200) NOT NULL,
+    PRICE_LEVEL NUMBER(12,2) NOT NULL,
+    DURATION_HOURS NUMBER NOT NULL,
+    DESCRIPTION VARCHAR(1000),
+    CREATED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    UPDATED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- ============================================================================
+-- PER-ZONE IMPACTS
+-- ============================================================================
+-- DR savings are linear in capacity, so one row per scenario and zone covers
+-- every capacity: TOTAL_SAVINGS = SAVINGS_PER_MWH * DURATION_HOURS * capacity.
+-- Rows are rewritten only when PRICE_STATS_VERSION no longer matches.
+
+CREATE TABLE IF NOT EXISTS DISPATCH_SCENARIO_IMPACT (
+    SCENARIO_KEY VARCHAR(100) NOT NULL,
+    ZONE_CODE VARCHAR(50) NOT NULL,
+    PRICE_STATS_VERSION VARCHAR(200) NOT NULL,
+    BASE_PRICE NUMBER(12,4) NOT NULL,
+    BASE_PRICE_SOURCE VARCHAR(20),
+    SAVINGS_PER_MWH NUMBER(14,4) NOT NULL,
+    COMPUTED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    CONSTRAINT PK_DISPATCH_SCENARIO_IMPACT PRIMARY KEY (SCENARIO_KEY, ZONE_CODE)
+);